@@ -1,10 +1,12 @@
 from collections import Counter, defaultdict
 
-from tqdm import trange
+from tqdm import tqdm, trange
 
 from search.load import get_student_assignments
 from splendor.arena import Arena
 from splendor.game import SplendorGame
+from splendor.scheduler import Scheduler
+from splendor.tournament import swiss, double_elimination
 from math import isnan
 
 TRIALS = 12
@@ -21,15 +23,17 @@ if __name__ == "__main__":
               '   [3] Tournament (3 player)\n'
               '   [4] Tournament (4 player)\n'
               '   [5] 1:1 match with human\n'
-              '   [6] human vs human')
+              '   [6] human vs human\n'
+              '   [7] Swiss tournament (2~4 player)\n'
+              '   [8] Double-elimination tournament (2~4 player)')
         competition_type = input('Choose: ').strip()
 
-        if competition_type not in '123456':
+        if competition_type not in '12345678':
             print(f'Input "{competition_type}" is invalid!')
             competition_type = ''
 
     # Query 2. Display
-    display_type = '1' if competition_type in '56' else ''
+    display_type = '1' if competition_type in '56' else ('3' if competition_type in '78' else '')
     while not display_type:
         print('Do you want to display moves?\n'
               '   [1] Always\n'
@@ -51,6 +55,27 @@ if __name__ == "__main__":
             seconds = max(int(seconds), 1)
         print(f"For each turn, the display will wait for {seconds} second(s).")
 
+    if competition_type in '78':
+        n_players = ''
+        while n_players not in ('2', '3', '4'):
+            n_players = input('How many players per game (2, 3 or 4)? ').strip()
+        n_players = int(n_players)
+
+        with Scheduler(agents=players) as scheduler:
+            print()
+            print('=' * 80)
+            print('FINAL RESULT')
+            print('-' * 80)
+            if competition_type == '7':
+                standings = swiss(players, scheduler, n_players, TRIALS)
+                for rank, (p, points) in enumerate(standings, 1):
+                    print(f'{rank:3d}. {p:10s} {points:5.2f} points')
+            else:
+                ranking = double_elimination(players, scheduler, n_players, TRIALS)
+                for rank, p in enumerate(ranking, 1):
+                    print(f'{rank:3d}. {p:10s}')
+        exit()
+
     # Generate match
     match_events = []
     n_players = 2
@@ -71,22 +96,32 @@ if __name__ == "__main__":
     else:
         match_events = [('human1', 'human2')]
 
-    # Initialize game
-    game = SplendorGame(n_players)
+    def play_locally():
+        # Initialize game
+        game = SplendorGame(n_players)
 
-    winning_log = defaultdict(list)
-    for match in match_events:
-        arena = Arena(game, *match)
+        for match in match_events:
+            arena = Arena(game, *match)
 
-        counter = Counter()
-        for trial in trange(TRIALS, desc=' vs '.join(match)):
-            # Reset the game
-            game.reset()
-            arena.rotate_players()
+            counter = Counter()
+            for trial in trange(TRIALS, desc=' vs '.join(match)):
+                # Reset the game
+                game.reset()
+                arena.rotate_players()
 
-            display = (display_type == '1') or (trial == 0 and display_type == '2') or ('human' in match)
-            counter.update(arena.play(verbose=display, wait=seconds))
+                display = (display_type == '1') or (trial == 0 and display_type == '2') or ('human' in match)
+                counter.update(arena.play(verbose=display, wait=seconds))
+            yield match, counter
 
+    if display_type == '3' and competition_type in '1234':
+        # Nothing to display, matches run in parallel reusing agents of each worker
+        with Scheduler(agents=players) as scheduler:
+            results = list(tqdm(scheduler.run(match_events, TRIALS), total=len(match_events), desc='Matches'))
+    else:
+        results = play_locally()
+
+    winning_log = defaultdict(list)
+    for match, counter in results:
         print()
         print('-' * 80)
         for p, c in sorted(counter.items(), key=lambda t: t[1], reverse=True):
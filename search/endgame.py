@@ -0,0 +1,136 @@
+"""
+Endgame solver for near-terminal positions.
+
+Once a player is within a few points of score_win, the game usually ends at the
+next round boundary. The solver then runs an exhaustive alpha-beta search (other
+players are assumed to minimize the utility of the player to move, "paranoid"
+hypothesis) until the end of the round, taking the expectation over revealed
+deck cards at chance nodes. Solved positions are kept in a bounded LRU table.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from splendor.game import SplendorGame
+
+EXACT, LOWER, UPPER = range(3)
+# Buy first (visible then reserved), then take gems, reserve, and pass last. Exchanges
+# (actions 61 and above, if enabled) come after taking gems.
+move_ordering = np.concatenate((np.arange(0, 12), np.arange(27, 30), np.arange(45, 60)[::-1],
+                                np.arange(30, 45)[::-1], np.arange(12, 27), [60]))
+
+
+def ordered_moves(nb_actions):
+    return np.insert(move_ordering, 15 + 30, np.arange(61, nb_actions)) if nb_actions > 61 else move_ordering
+
+
+class EndgameSolver:
+    def __init__(self, game: SplendorGame, margin=3, rounds=1, by_color=True, table_size=200000):
+        """
+        Input:
+            game: game object, its board is used as a scratch board
+            margin: solver applies when a player is at most margin points from winning
+            rounds: search horizon, the current round plus rounds-1 extra rounds
+            by_color: True to group chance outcomes by bonus color (one sampled card per
+                      color), False to enumerate every card that can be revealed. Only
+                      values of the latter are exact: use it when a win must be proven
+            table_size: maximum number of positions kept in transposition table
+        """
+        self.game = game
+        self.margin = margin
+        self.rounds = rounds
+        self.by_color = by_color
+        self.table_size = table_size
+        self.table = OrderedDict()
+        self.root_player = -1
+
+    def applies(self, board) -> bool:
+        best_score = max(self.game.player_score(board, p) for p in range(self.game.num_players))
+        return best_score >= self.game.board.score_win - self.margin
+
+    def solve(self, board, player: int):
+        """
+        Input:
+            board: current board
+            player: player to move
+
+        Returns:
+            action: best action for player
+            value: its utility (1 for a certain win, -1 for a certain loss), leaves
+                   beyond horizon being estimated by the difference of scores
+        """
+        n = self.game.num_players
+        depth = n - self.game.number_of_turns_so_far(board) % n + n * (self.rounds - 1)
+        self.root_player = player
+        return self._search(board, player, depth, -np.inf, np.inf)
+
+    def _heuristic(self, board):
+        scores = [self.game.player_score(board, p) for p in range(self.game.num_players)]
+        mine = scores.pop(self.root_player)
+        return float(np.clip((mine - max(scores)) / self.game.board.score_win, -0.5, 0.5))
+
+    def _child_value(self, board, player, action, depth, alpha, beta):
+        event = self.game.chance_event_of(action)
+        next_board, next_player = self.game.next_state_of(board, player, action, deterministic=True)
+        if event is None:
+            return self._search(next_board, next_player, depth - 1, alpha, beta)[1]
+
+        columns, card_indexes, probs = self.game.chance_outcomes(next_board, event[0], self.by_color)
+        if probs.size == 0:
+            return self._search(next_board, next_player, depth - 1, alpha, beta)[1]
+        # Bounds of children can't be averaged, so chance children are searched with a full window
+        next_board = next_board.copy()
+        value = 0.
+        for column, card_index, prob in zip(columns, card_indexes, probs):
+            outcome = self.game.apply_chance_outcome(next_board, player, action, column, card_index)
+            value += prob * self._search(outcome, next_player, depth - 1, -np.inf, np.inf)[1]
+        return value
+
+    def _search(self, board, player, depth, alpha, beta):
+        utilities = self.game.game_ended(board)
+        if utilities.any():
+            return None, float(utilities[self.root_player])
+        if depth == 0:
+            return None, self._heuristic(board)
+
+        # Values are utilities of root player, which is part of the key
+        key = (board.tobytes(), depth, self.root_player)
+        entry = self.table.get(key)
+        if entry is not None:
+            self.table.move_to_end(key)
+            best_action, value, flag = entry
+            if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                return best_action, value
+
+        maximizing = (player == self.root_player)
+        valids = self.game.valid_moves(board, player)
+        actions = [a for a in ordered_moves(len(valids)) if valids[a]]
+        if entry is not None and entry[0] is not None:
+            actions.remove(entry[0])
+            actions.insert(0, entry[0])
+
+        original_alpha, original_beta = alpha, beta
+        best_action, best_value = None, (-np.inf if maximizing else np.inf)
+        board = board.copy()
+        for action in actions:
+            value = self._child_value(board, player, action, depth, alpha, beta)
+            if (maximizing and value > best_value) or (not maximizing and value < best_value):
+                best_action, best_value = int(action), value
+            if maximizing:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= original_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (best_action, best_value, flag)
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+
+        return best_action, best_value
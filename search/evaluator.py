@@ -0,0 +1,155 @@
+"""
+Small MLP evaluating boards, as the network of AlphaZero but sized for CPU.
+
+Input is the int8 observation returned by Board.get_state(), seen from the point
+of view of the player to move (see SplendorGame.canonical_state). Outputs are
+policy logits over the 61 actions and the expected utility of each player, in
+the same canonical order. Exchanges (actions 61 and above, see
+SplendorGame(exchanges=True)) are unknown to the network and get no prior.
+Weights are stored in a .npz file.
+"""
+from pathlib import Path
+
+import numpy as np
+
+from splendor.logic_numba import action_size, observation_size
+
+DEFAULT_WEIGHTS = Path(__file__).parent / 'evaluator.npz'
+input_scale = np.float32(1 / 8)
+
+
+def encode(states):
+    states = np.asarray(states)
+    return states.reshape(states.shape[0], -1).astype(np.float32) * input_scale
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class MLPEvaluator:
+    def __init__(self, num_players=2, hidden=(256, 128), seed=0):
+        rng = np.random.default_rng(seed)
+        rows, cols = observation_size(num_players)
+        sizes = [rows * cols, *hidden]
+        self.num_players = num_players
+        self.params = {}
+        for i, (size_in, size_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+            self.params[f'W{i}'] = (rng.standard_normal((size_in, size_out)) * np.sqrt(2 / size_in)).astype(np.float32)
+            self.params[f'b{i}'] = np.zeros(size_out, dtype=np.float32)
+        self.params['Wp'] = (rng.standard_normal((sizes[-1], action_size())) * 0.01).astype(np.float32)
+        self.params['bp'] = np.zeros(action_size(), dtype=np.float32)
+        self.params['Wv'] = (rng.standard_normal((sizes[-1], num_players)) * 0.01).astype(np.float32)
+        self.params['bv'] = np.zeros(num_players, dtype=np.float32)
+        self._adam = None
+
+    @property
+    def nb_layers(self):
+        return sum(1 for name in self.params if name[0] == 'W' and name[1:].isdigit())
+
+    @classmethod
+    def load(cls, path=DEFAULT_WEIGHTS):
+        with np.load(path) as data:
+            evaluator = cls.__new__(cls)
+            evaluator.params = {name: data[name].astype(np.float32) for name in data.files}
+        evaluator.num_players = evaluator.params['bv'].shape[0]
+        evaluator._adam = None
+        return evaluator
+
+    @classmethod
+    def load_if_exists(cls, path=DEFAULT_WEIGHTS, num_players=2):
+        if Path(path).exists():
+            evaluator = cls.load(path)
+            if evaluator.num_players == num_players:
+                return evaluator
+        return None
+
+    def save(self, path=DEFAULT_WEIGHTS):
+        np.savez(path, **self.params)
+
+    def _forward(self, x):
+        activations = [x]
+        for i in range(self.nb_layers):
+            x = np.maximum(x @ self.params[f'W{i}'] + self.params[f'b{i}'], 0.)
+            activations.append(x)
+        logits = x @ self.params['Wp'] + self.params['bp']
+        values = np.tanh(x @ self.params['Wv'] + self.params['bv'])
+        return activations, logits, values
+
+    def predict(self, states, valids=None):
+        """
+        Input:
+            states: batch of canonical boards, shape (N, rows, 7)
+            valids: optional batch of valid moves, shape (N, 61) or (N, 516) with exchanges, to mask the policy
+
+        Returns:
+            policies: probability of each action, shape (N, 61) or as valids (exchanges getting 0)
+            values: expected utility of each player in canonical order, shape (N, num_players)
+        """
+        _, logits, values = self._forward(encode(states))
+        if valids is None:
+            return _softmax(logits), values
+        known = logits.shape[1]
+        policies = np.zeros(valids.shape, dtype=np.float32)
+        policies[:, :known] = _softmax(np.where(valids[:, :known], logits, -np.inf))
+        return policies, values
+
+    def train_step(self, states, policies, values, lr=1e-3, weight_decay=1e-4, weights=None):
+        """
+        One Adam step on a minibatch, minimizing cross-entropy of policies plus
+        mean squared error of values.
+
+        Input:
+            weights: optional per-sample weights scaling losses and gradients (e.g. importance-sampling
+                     weights of a prioritized replay buffer), None for uniform weights
+
+        Returns:
+            policy loss and value loss of the minibatch (before the update)
+        """
+        batch_size = states.shape[0]
+        weights = np.ones(batch_size, dtype=np.float32) if weights is None else np.asarray(weights, np.float32)
+        activations, logits, predicted = self._forward(encode(states))
+        probs = _softmax(logits)
+        policy_loss = (weights * -(policies * np.log(probs + 1e-8)).sum(axis=1)).mean()
+        value_loss = (weights[:, None] * (predicted - values) ** 2).mean()
+
+        grads = {}
+        d_logits = weights[:, None] * (probs - policies) / batch_size
+        d_values = weights[:, None] * 2 * (predicted - values) * (1 - predicted ** 2) / predicted.size
+        last = activations[-1]
+        grads['Wp'], grads['bp'] = last.T @ d_logits, d_logits.sum(axis=0)
+        grads['Wv'], grads['bv'] = last.T @ d_values, d_values.sum(axis=0)
+        d_hidden = d_logits @ self.params['Wp'].T + d_values @ self.params['Wv'].T
+        for i in range(self.nb_layers - 1, -1, -1):
+            d_hidden = d_hidden * (activations[i + 1] > 0)
+            grads[f'W{i}'], grads[f'b{i}'] = activations[i].T @ d_hidden, d_hidden.sum(axis=0)
+            if i > 0:
+                d_hidden = d_hidden @ self.params[f'W{i}'].T
+
+        if self._adam is None:
+            self._adam = {'t': 0, 'm': {k: np.zeros_like(v) for k, v in self.params.items()},
+                          'v': {k: np.zeros_like(v) for k, v in self.params.items()}}
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        self._adam['t'] += 1
+        t = self._adam['t']
+        for name, grad in grads.items():
+            if name[0] == 'W':
+                grad = grad + weight_decay * self.params[name]
+            m = self._adam['m'][name] = beta1 * self._adam['m'][name] + (1 - beta1) * grad
+            v = self._adam['v'][name] = beta2 * self._adam['v'][name] + (1 - beta2) * grad ** 2
+            step = lr * (m / (1 - beta1 ** t)) / (np.sqrt(v / (1 - beta2 ** t)) + eps)
+            self.params[name] -= step.astype(np.float32)
+
+        return float(policy_loss), float(value_loss)
+
+    def fit(self, states, policies, values, epochs=10, batch_size=64, lr=1e-3, rng=None):
+        rng = rng or np.random.default_rng()
+        losses = []
+        for _ in range(epochs):
+            order = rng.permutation(states.shape[0])
+            for start in range(0, order.size, batch_size):
+                batch = order[start:start + batch_size]
+                losses.append(self.train_step(states[batch], policies[batch], values[batch], lr))
+        return np.mean(losses, axis=0) if losses else (np.nan, np.nan)
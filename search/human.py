@@ -41,7 +41,7 @@ class Assignment:
                 print()
             if v:
                 if 0 <= i < 12 or 27 <= i < 30 or (30 <= i < 35 and can_take <= 1) or (
-                        35 <= i < 45 and can_take <= 2) or 45 <= i < 60 or (60 <= i < 80 and need_to_give_gems):
+                        35 <= i < 45 and can_take <= 2) or 45 <= i < 60 or (i >= 60 and need_to_give_gems):
                     print(f'{i} = {move_to_str(i, short=True):15s}', end='\t')
         print('([+] to show all moves)')
 
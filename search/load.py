@@ -1,12 +1,162 @@
+"""
+Registry of agents.
+
+Each search_<name>.py file is an agent. Its parameters are the keyword arguments
+of Assignment.__init__ after game, with their default values. It may also
+declare its resource needs in a module-level literal AGENT_SPEC dictionary:
+    AGENT_SPEC = {
+        'threads': 8,  # threads used while searching
+        'memory_mb': 64,  # memory needed by one instance
+        'assignment': False,  # infrastructure agent, not listed by get_student_assignments
+    }
+Both are read from the source without importing the module, so listing agents
+is cheap: an agent is only imported when it is instantiated. Agents are
+instantiated from configurations like 'ismcts:playouts=1000,exploration=1.2',
+parameters being converted to the type of their default value.
+"""
+import ast
+import os
+from importlib import import_module
 from pathlib import Path
 
+default_spec = {'threads': 1, 'memory_mb': 0, 'assignment': True}
+_specs = {}
 
-def get_student_assignments():
-    assignments = []
+
+def get_agents():
+    agents = []
     for search in Path(__file__).parent.glob('search_*.py'):
-        assignments.append(search.stem.split('_')[1])
+        agents.append(search.stem.split('_')[1])
+
+    return sorted(agents)
+
+
+def get_student_assignments():
+    # Agents competing in leagues and tournaments, without infrastructure agents (which can still be created by name)
+    return [name for name in get_agents() if agent_spec(name)['assignment']]
+
+
+def _module_name(name):
+    return 'search.human' if name.startswith('human') else f'search.search_{name}'
+
+
+_constant_nodes = (ast.Expression, ast.Constant, ast.BinOp, ast.UnaryOp, ast.operator, ast.unaryop)
+
+
+def _default_value(node):
+    # Literal or constant expression (e.g. 32 << 20), None if it can't be known without importing
+    if all(isinstance(child, _constant_nodes) for child in ast.walk(node)):
+        return eval(compile(ast.Expression(node), '<default>', 'eval'), {'__builtins__': {}})
+    return None
+
+
+def _init_params(tree):
+    # Keyword arguments of Assignment.__init__ (after self and game) with their defaults
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == 'Assignment':
+            for method in node.body:
+                if isinstance(method, ast.FunctionDef) and method.name == '__init__':
+                    arguments = method.args
+                    names = [arg.arg for arg in arguments.args[len(arguments.args) - len(arguments.defaults):]]
+                    params = {name: _default_value(default) for name, default in zip(names, arguments.defaults)}
+                    for arg, default in zip(arguments.kwonlyargs, arguments.kw_defaults):
+                        if default is not None:
+                            params[arg.arg] = _default_value(default)
+                    return params
+    return {}
+
+
+def _read_spec(path):
+    tree = ast.parse(path.read_text())
+    spec = dict(default_spec)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'AGENT_SPEC' for t in node.targets):
+            spec.update(ast.literal_eval(node.value))
+    spec['params'] = _init_params(tree)
+    return spec
+
+
+def agent_spec(name):
+    """
+    Returns: AGENT_SPEC of agent (completed with default values) and its parameters with their
+             default values ('params', None for defaults which are not constants), read without importing it
+    """
+    if name not in _specs:
+        path = Path(__file__).parent / (_module_name(name).split('.')[1] + '.py')
+        if not path.exists():
+            raise ValueError(f'Unknown agent "{name}", available agents are {get_agents()}')
+        _specs[name] = _read_spec(path)
+    return _specs[name]
+
+
+def _convert(value, default):
+    if isinstance(default, bool):
+        if value.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError(f'Invalid boolean "{value}"')
+        return value.lower() in ('true', '1')
+    if isinstance(default, (int, float, str)):
+        return type(default)(value)
+    # No default type to follow (e.g. None): literal if possible, else string
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def parse_config(config):
+    """
+    Input:
+        config: agent name, optionally followed by parameters, e.g. 'ismcts:playouts=1000,exploration=1.2'
+
+    Returns:
+        name, dictionary of parameters (validated against the agent's spec)
+    """
+    name, _, arguments = config.partition(':')
+    schema = agent_spec(name)['params']
+    params = {}
+    for argument in filter(None, arguments.split(',')):
+        key, sep, value = argument.partition('=')
+        if not sep:
+            raise ValueError(f'Parameter "{argument}" of "{config}" should be written key=value')
+        if key not in schema:
+            raise ValueError(f'Agent "{name}" has no parameter "{key}", available ones are {sorted(schema)}')
+        params[key] = _convert(value, schema[key])
+    return name, params
+
+
+def format_config(name, params):
+    return name + (':' + ','.join(f'{k}={v}' for k, v in params.items()) if params else '')
+
+
+def max_workers(configs, cpus=None, memory_mb=None):
+    """
+    Input:
+        configs: agent configurations which will be instantiated in each worker
+        cpus, memory_mb: resources of the machine, detected if None
+
+    Returns: number of worker processes the machine can run without oversubscribing threads or memory
+    """
+    specs = [agent_spec(parse_config(config)[0]) for config in set(configs)]
+    cpus = cpus or os.cpu_count() or 1
+    workers = max(cpus // max([spec['threads'] or 1 for spec in specs], default=1), 1)
+    if memory_mb is None and hasattr(os, 'sysconf'):
+        try:
+            memory_mb = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') >> 20
+        except (ValueError, OSError):
+            pass
+    needed = sum(spec['memory_mb'] for spec in specs)
+    if memory_mb and needed:
+        workers = max(min(workers, memory_mb // needed), 1)
+    return workers
+
 
-    return sorted(assignments)
+def create_agent(game, config):
+    """
+    Import agent (only now) and instantiate it for game with the parameters of config
+    """
+    name, params = parse_config(config)
+    module = import_module(_module_name(name))
+    return module.Assignment(game, **params)
 
 
-__ALL__ = ['get_student_assignments']
+__ALL__ = ['get_agents', 'get_student_assignments', 'agent_spec', 'parse_config', 'format_config', 'max_workers', 'create_agent']
@@ -0,0 +1,239 @@
+"""
+Opening book mined from self-play.
+
+Positions are keyed by a 64-bit hash of an abstraction which repeats across
+deals: turn, bank, gems, bonuses, points and number of reserved cards of each
+player. Dealt cards and nobles are left out, so that every game starts from the
+same key, and colors are then interchangeable: they are put in a canonical
+order (see color_order) and gem moves are stored in that order. Moves on a card
+(buy, reserve, buy from reserve) are recorded by the features of the card
+(canonical bonus color, points and total cost) instead of its slot, and are
+played back on any card of the current position sharing these features.
+
+A move is only answered once played min_visits times in the same position, so
+books need many games per position: with greedy agents, a book of 2000 games
+answers the first 2 plies of every new deal and the third ply of about 1 deal
+in 6, while a book of 40 games answers none. Statistics are stored in a numpy array sorted by key, action
+and card, which is memory-mapped and searched by bisection.
+
+Build a book with:
+    python -m search.opening_book --agents greedy greedy --games 10000 --plies 8
+"""
+import argparse
+from collections import defaultdict
+from hashlib import blake2b
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+from splendor.arena import Arena
+from splendor.game import SplendorGame
+from splendor.logic import decode_states, idx_points, move_kinds, move_records
+
+DEFAULT_PATH = Path(__file__).parent / 'opening_book.npy'
+no_feature = 0xFFFF
+book_dtype = np.dtype([('key', '<u8'), ('action', '<u2'), ('card', '<u2'), ('visits', '<u4'), ('wins', '<f4')])
+
+
+def _num_players(board):
+    return next(n for n in range(2, 5) if board.shape[0] == 32 + 10 * n + n * n)
+
+
+def _gem_actions():
+    # Gem moves by what they take and give, to translate them from a color order to another
+    kinds = [move_kinds.index(kind) for kind in ('take_different', 'take_identical', 'exchange')]
+    records = move_records[np.isin(move_records['kind'], kinds)]
+    return {(int(r['kind']), r['gems'].tobytes(), r['given'].tobytes()): int(r['action']) for r in records}
+
+
+gem_actions = _gem_actions()
+
+
+def color_order(board):
+    """
+    Returns: canonical order of the 5 colors. Cards being out of the abstraction, colors are
+             interchangeable: they are sorted by their bank, gems and bonuses columns.
+    """
+    state = decode_states(board, _num_players(board))
+    columns = np.vstack([state.bank[:5], state.gems[:, :5], state.cards])
+    return np.lexsort(columns[::-1])
+
+
+def position_key(board):
+    """
+    Returns: 64-bit hash of the abstraction of board (see module documentation)
+    """
+    state = decode_states(board, _num_players(board))
+    order = color_order(board)
+    abstraction = np.concatenate([state.turn.reshape(1).astype(np.int8), state.bank[order], state.bank[5:],
+                                  state.gems[:, order].ravel(), state.gems[:, 5], state.cards[:, order].ravel(),
+                                  state.points, state.reserved])
+    return int.from_bytes(blake2b(abstraction.tobytes(), digest_size=8).digest(), 'little')
+
+
+def card_feature(rows, rank):
+    """
+    Input:
+        rows: card as stored in board, of shape (2, 7)
+        rank: rank of each color in canonical order
+
+    Returns: code of canonical bonus color, points and total cost of card, no_feature for an empty slot
+    """
+    if not rows[1, :5].any():
+        return no_feature
+    return (int(rank[rows[1, :5].argmax()]) * 8 + int(rows[1, idx_points])) * 32 + int(rows[0, :5].sum())
+
+
+def _card_slots(board, action, player):
+    # First action of the group of action, and card rows of each slot of this group
+    n = _num_players(board)
+    if action < 24:
+        first = action - action % 4
+        tier = first % 12 // 4
+        return first, board[1 + 8 * tier:9 + 8 * tier].reshape(4, 2, 7)
+    if 27 <= action < 30:
+        reserved = 32 + 4 * n + n * n + 6 * player
+        return 27, board[reserved:reserved + 6].reshape(3, 2, 7)
+    return action, None
+
+
+def _translate_gems(action, order, to_canonical):
+    record = move_records[action]
+    gems, given = record['gems'].copy(), record['given'].copy()
+    if to_canonical:
+        gems, given[:5] = gems[order], given[order]
+    else:
+        gems[order], given[order] = record['gems'], record['given'][:5]
+    return gem_actions[int(record['kind']), gems.tobytes(), given.tobytes()]
+
+
+def to_book_action(board, action, player):
+    """
+    Returns: (action, card) as stored in book: gem moves are in canonical colors, card moves are
+             stored as the first action of their group and the feature of the card they play
+    """
+    order = color_order(board)
+    first, slots = _card_slots(board, action, player)
+    if slots is not None:
+        return first, card_feature(slots[action - first], np.argsort(order))
+    if action in range(30, 60) or action >= 61:
+        return _translate_gems(action, order, True), no_feature
+    return action, no_feature
+
+
+def from_book_action(board, action, card, player):
+    """
+    Returns: actions of current position matching a book move (several if many cards share its feature)
+    """
+    order = color_order(board)
+    first, slots = _card_slots(board, action, player)
+    if slots is not None:
+        rank = np.argsort(order)
+        return [first + slot for slot in range(len(slots)) if card_feature(slots[slot], rank) == card]
+    if action in range(30, 60) or action >= 61:
+        return [_translate_gems(action, order, False)]
+    return [action]
+
+
+class OpeningBook:
+    def __init__(self, path=DEFAULT_PATH, min_visits=10):
+        self.entries = np.load(path, mmap_mode='r')
+        self.keys = self.entries['key']
+        self.min_visits = min_visits
+
+    @classmethod
+    def load_if_exists(cls, path=DEFAULT_PATH, **kwargs):
+        return cls(path, **kwargs) if Path(path).exists() else None
+
+    def lookup(self, board, valids=None, player=None):
+        """
+        Input:
+            board: current board
+            valids: optional valid moves of current player, to double-check the answer
+            player: current player, deduced from the turn if None
+
+        Returns:
+            Action with best win rate among book moves (played at least min_visits
+            times) which can be played in this position, or None if position is not in the book
+        """
+        if player is None:
+            n = _num_players(board)
+            player = int(decode_states(board, n).turn) % n
+        key = position_key(board)
+        start = np.searchsorted(self.keys, np.uint64(key), side='left')
+        end = np.searchsorted(self.keys, np.uint64(key), side='right')
+        rows = self.entries[start:end]
+        rows = rows[rows['visits'] >= self.min_visits]
+        for row in rows[np.argsort(-(rows['wins'] / rows['visits']), kind='stable')]:
+            for action in from_book_action(board, int(row['action']), int(row['card']), player):
+                if valids is None or valids[action]:
+                    return action
+        return None
+
+
+_worker = {}
+
+
+def _init_worker(agents, num_players):
+    game = SplendorGame(num_players)
+    _worker['game'] = game
+    _worker['arena'] = Arena(game, *agents)
+
+
+def _self_play(args):
+    seed, plies = args
+    np.random.seed(seed)
+    game, agents = _worker['game'], _worker['arena'].players
+    for p, agent in enumerate(agents):
+        agent.player_id = p
+
+    records = []
+    board, player = game.initial_state(), 0
+    while not game.game_ended(board).any():
+        action = agents[player].search(board)
+        if not game.valid_moves(board, player)[action]:
+            action = 60
+        if len(records) < plies:
+            records.append((position_key(board), *to_book_action(board, action, player), player))
+        board, next_player = game.next_state_of(board, player, action)
+        for agent in agents:
+            agent.collect_action_done(board, player, action)
+        player = next_player
+
+    utilities = game.game_ended(board)
+    return [(key, action, card, float(utilities[player] > 0)) for key, action, card, player in records]
+
+
+def build_opening_book(agents, games, plies, num_players=2, workers=None, path=DEFAULT_PATH):
+    """
+    Play games between given agents on a pool of processes and store, for each
+    position of the first plies (see position_key), how often each move was played and won.
+    """
+    stats = defaultdict(lambda: [0, 0.])
+    tasks = [(seed, plies) for seed in range(games)]
+    with Pool(workers, initializer=_init_worker, initargs=(agents, num_players)) as pool:
+        for records in tqdm(pool.imap_unordered(_self_play, tasks, chunksize=16), total=games, desc='Self-play'):
+            for key, action, card, win in records:
+                stats[key, action, card][0] += 1
+                stats[key, action, card][1] += win
+
+    entries = np.array([(key, action, card, visits, wins) for (key, action, card), (visits, wins) in stats.items()],
+                       dtype=book_dtype)
+    entries.sort(order=['key', 'action', 'card'])
+    np.save(path, entries)
+    return entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build an opening book from self-play')
+    parser.add_argument('--agents', nargs='+', default=['greedy', 'greedy'], help='Agents playing each seat')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--plies', type=int, default=8, help='Number of plies stored per game')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', type=Path, default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    book = build_opening_book(args.agents, args.games, args.plies, len(args.agents), args.workers, args.output)
+    print(f'{book.size} entries saved to {args.output}')
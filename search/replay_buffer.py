@@ -0,0 +1,153 @@
+"""
+Replay buffer of self-play records living in shared memory, so that actor
+processes append samples without pickling them through queues.
+
+Capacity is split in one ring segment per producer: each producer is the single
+writer of its segment and of its cursor, hence appends need no lock. Oldest
+samples of a segment are evicted first. A sample may be read while its slot is
+being overwritten, which is an acceptable noise for training.
+
+Storage is either a shared memory block or, to spill large buffers on disk, a
+memory-mapped file that every process opens.
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from splendor.logic_numba import action_size, observation_size
+
+
+def _layout(capacity, num_players, producers):
+    rows, cols = observation_size(num_players)
+    fields = [
+        ('cursors', np.int64, (producers, 2)),  # per producer: next slot to write, number of samples ever written
+        ('states', np.int8, (capacity, rows, cols)),
+        ('policies', np.float32, (capacity, action_size())),
+        ('values', np.float32, (capacity, num_players)),
+        ('priorities', np.float32, (capacity,)),
+    ]
+    offsets, offset = {}, 0
+    for name, dtype, shape in fields:
+        offset = -(-offset // 8) * 8  # align each array on 8 bytes
+        offsets[name] = (offset, dtype, shape)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return offsets, offset
+
+
+class SharedReplayBuffer:
+    def __init__(self, capacity, num_players, producers=1, name=None, path=None):
+        """
+        Input:
+            capacity: number of samples kept, rounded down to a multiple of producers
+            num_players: number of players, defining size of samples
+            producers: number of processes appending samples, each owning a ring segment
+            name: name of existing shared memory to attach to, None to create a new one
+            path: if set, samples are stored in this memory-mapped file instead of shared memory
+        """
+        self.segment = capacity // producers
+        self.capacity = self.segment * producers
+        self.num_players = num_players
+        self.producers = producers
+        self.path = path
+        offsets, size = _layout(self.capacity, num_players, producers)
+
+        create = name is None
+        if path is not None:
+            self.shm = None
+            self.buf = np.memmap(path, dtype=np.uint8, mode='w+' if create else 'r+', shape=(size,))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+            self.buf = self.shm.buf
+        self._owner = create
+        for field, (offset, dtype, shape) in offsets.items():
+            setattr(self, field, np.ndarray(shape, dtype=dtype, buffer=self.buf, offset=offset))
+        if create:
+            self.cursors[:] = 0
+            self.priorities[:] = 0
+
+    def __getstate__(self):
+        return {'capacity': self.capacity, 'num_players': self.num_players, 'producers': self.producers,
+                'name': self.shm.name if self.shm is not None else '', 'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return int(np.minimum(self.cursors[:, 1], self.segment).sum())
+
+    @property
+    def total_written(self):
+        return int(self.cursors[:, 1].sum())
+
+    def extend(self, states, policies, values, producer=0):
+        """
+        Append samples to the ring segment of given producer. Only one process must
+        use a given producer index. New samples get the current max priority.
+        """
+        count = min(states.shape[0], self.segment)
+        start, written = self.cursors[producer]
+        indexes = producer * self.segment + (start + np.arange(count)) % self.segment
+        self.states[indexes] = states[-count:]
+        self.policies[indexes] = policies[-count:]
+        self.values[indexes] = values[-count:]
+        self.priorities[indexes] = max(self.priorities.max(), 1.)
+        # Cursors are updated once data is written, so readers only see complete samples
+        self.cursors[producer] = ((start + count) % self.segment, written + count)
+
+    def _filled(self):
+        # Number of valid slots at the beginning of each segment
+        return np.minimum(self.cursors[:, 1], self.segment)
+
+    def sample_indexes(self, batch_size, rng=np.random, alpha=0.):
+        """
+        Input:
+            alpha: 0 for uniform sampling, > 0 for sampling proportional to priority ** alpha
+
+        Returns:
+            indexes: slots of sampled data, to read states[indexes], ... or to update priorities
+            weights: importance-sampling weights (all ones for uniform sampling)
+        """
+        filled = self._filled()
+        if alpha == 0:
+            segment = rng.choice(self.producers, size=batch_size, p=filled / filled.sum())
+            indexes = segment * self.segment + (rng.random_sample(batch_size) * filled[segment]).astype(np.int64)
+            return indexes, np.ones(batch_size, dtype=np.float32)
+
+        valid = (np.arange(self.segment)[None, :] < filled[:, None]).ravel()
+        probs = np.where(valid, self.priorities, 0.).astype(np.float64) ** alpha
+        probs /= probs.sum()
+        indexes = rng.choice(self.capacity, size=batch_size, p=probs)
+        weights = (valid.sum() * probs[indexes]) ** -1.
+        return indexes, (weights / weights.max()).astype(np.float32)
+
+    def sample(self, batch_size, rng=np.random, alpha=0., out=None):
+        """
+        Sample a minibatch. Data is gathered into out arrays if given (states, policies,
+        values) so that a learner can reuse the same buffers without allocating.
+
+        Returns:
+            states, policies, values, indexes, weights
+        """
+        indexes, weights = self.sample_indexes(batch_size, rng, alpha)
+        if out is None:
+            out = (np.empty((batch_size,) + self.states.shape[1:], dtype=self.states.dtype),
+                   np.empty((batch_size, self.policies.shape[1]), dtype=self.policies.dtype),
+                   np.empty((batch_size, self.values.shape[1]), dtype=self.values.dtype))
+        for array, result in zip((self.states, self.policies, self.values), out):
+            np.take(array, indexes, axis=0, out=result)
+        return out + (indexes, weights)
+
+    def update_priorities(self, indexes, priorities, eps=1e-3):
+        self.priorities[indexes] = np.abs(priorities) + eps
+
+    def close(self):
+        if self.shm is not None:
+            # Views must be released before closing the shared memory
+            for field in ('cursors', 'states', 'policies', 'values', 'priorities'):
+                setattr(self, field, None)
+            self.buf = None
+            self.shm.close()
+            if self._owner:
+                self.shm.unlink()
+        else:
+            self.buf.flush()
@@ -16,6 +16,9 @@ class Assignment:
     def __call__(self, *args, **kwargs):
         return self.search(*args, **kwargs)
 
+    def reset(self):
+        self.myBonus = [0, 0, 0, 0, 0]
+
     def search(self, board) -> int:
         """
         This function do adversarial searching using the given game board.
@@ -38,13 +41,11 @@ class Assignment:
         """
 
         # Get all possible cards
-        cards = []
-        for i in range(3):
-            cards = cards + self.game.get_cards_with_tier(board, i)
+        observation = self.game.observe(board)
+        cards = observation['cards']
 
         # Assign ratios
-        for card in cards:
-            card['ratio'] = self.ratio(board, card)
+        ratios = [self.ratio(observation, card) for card in cards]
 
         # Debugging
         #f = open("logs.txt", "a")
@@ -56,25 +57,25 @@ class Assignment:
         # Find the highest ratio card
         myCardID = 0
         for i in range(1, len(cards)):
-            if cards[i]['ratio'] > cards[myCardID]['ratio']:
+            if ratios[i] > ratios[myCardID]:
                 myCardID = i
         
-        neededGems = [i for i in cards[myCardID]['cost']]
-        myGems = self.game.get_player_gems(board, self.player_id)
+        neededGems = cards[myCardID]['cost'].tolist()
+        myGems = observation['gems'][self.player_id].tolist()
         for i in range(len(neededGems)):
             neededGems[i] -= (myGems[i] + self.myBonus[i])
 
         buy = neededGems[0] <= 0 and neededGems[1] <= 0 and neededGems[2] <= 0 and neededGems[3] <= 0 and neededGems[4] <= 0
         if buy:
             for i in range(5):
-                self.myBonus[i] += cards[myCardID]['earning'][i]
+                self.myBonus[i] += int(cards[myCardID]['earning'][i])
             return myCardID
         else:
             #valids = [a for a, v in enumerate(self.game.valid_moves(board, self.player_id)) if v == 1]
             ## Best move is to get 3 different ones
             #valids = filter(lambda number: number >= 30, valids)
 
-            gemsToPick = self.game.get_gems_in_bank(board)
+            gemsToPick = observation['bank'].tolist()
             picking = 0
             for i in range(len(neededGems)):
                 if neededGems[i] > 0 and gemsToPick[i] > 0:
@@ -120,7 +121,7 @@ class Assignment:
                         move += i - first - 1
                         return move
             elif picking == 1: ## If only 1 type available buy 1 or 2 of it depending on how much is needed
-                bank = self.game.get_gems_in_bank(board)
+                bank = observation['bank'].tolist()
                 for i in range(len(neededGems)):
                     if neededGems[i] > 0 and gemsToPick[i] > 0:
                         if neededGems[i] > 1 and bank[i] >= 4:
@@ -136,15 +137,15 @@ class Assignment:
         a = 5
         #raise NotImplementedError()
 
-    def ratio(self, board, card):
-        bank = self.game.get_gems_in_bank(board)
-        myGems = self.game.get_player_gems(board, self.player_id)
+    def ratio(self, observation, card):
+        bank = observation['bank'].tolist()
+        myGems = observation['gems'][self.player_id].tolist()
 
         turns = 1 # for buying the card
-        prestige = card['earning'][6]
+        prestige = int(card['earning'][6])
 
         # Deep copy to not mess up the initial values
-        values = [i for i in card['cost']]
+        values = card['cost'].tolist()
 
         total = 0
         for i in range(len(values)):
@@ -0,0 +1,158 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numba import njit
+from numpy import random
+
+from search.endgame import EndgameSolver
+from search.opening_book import OpeningBook
+from splendor.game import SplendorGame
+from splendor.logic_numba import Board, action_size
+
+AGENT_SPEC = {
+    'threads': 8,
+    'memory_mb': 64,
+    'assignment': False,
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _shared_executor(threads):
+    # One pool per process and size, shared by all instances, so that agents created for every game
+    # don't leave idle threads behind (the pools are joined when the interpreter exits)
+    with _executors_lock:
+        if threads not in _executors:
+            _executors[threads] = ThreadPoolExecutor(max_workers=threads)
+        return _executors[threads]
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _select_uct(valids, visits, wins, exploration):
+    total = 0.
+    for act in valids:
+        total += visits[act]
+    log_total = np.log(total + 1.)
+
+    best_act, best_value = valids[0], -np.inf
+    for act in valids:
+        if visits[act] == 0:
+            value = 1e9 + np.random.random()  # Try unvisited actions first, in random order
+        else:
+            value = wins[act] / visits[act] + exploration * np.sqrt(log_total / visits[act])
+        if value > best_value:
+            best_act, best_value = act, value
+    return best_act
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def determinized_uct(state, num_players, player, playouts, exploration, seed, nb_actions):
+    """
+    Run UCT on one determinization of state: draw order of the decks is sampled
+    once from the bitfields, so the game tree doesn't contain any chance node.
+    Compiled without GIL, so several determinizations can run in parallel threads.
+    nb_actions is the size of the action space of the game (exchanges enabled or not).
+
+    Returns:
+        visits, wins: statistics of each action at root
+    """
+    np.random.seed(seed)
+    board = Board(num_players)
+    if nb_actions > action_size():
+        board.enable_exchanges()
+    board.copy_state(state, True)
+    board.set_determinization(board.sample_determinization())
+
+    max_nodes = playouts + 1
+    children = np.full((max_nodes, nb_actions), -1, dtype=np.int32)
+    visits = np.zeros((max_nodes, nb_actions), dtype=np.float32)
+    wins = np.zeros((max_nodes, nb_actions), dtype=np.float32)
+    nb_nodes = 1
+    path_nodes = np.zeros(max_nodes, dtype=np.int32)
+    path_actions = np.zeros(max_nodes, dtype=np.int32)
+    path_players = np.zeros(max_nodes, dtype=np.int32)
+
+    for _ in range(playouts):
+        board.copy_state(state, True)
+        node, cur_player, depth = 0, player, 0
+        result = board.check_end_game()
+
+        # Selection and expansion of a single new node
+        while not result.any():
+            valids = np.flatnonzero(board.valid_moves(cur_player))
+            act = _select_uct(valids, visits[node], wins[node], exploration)
+            path_nodes[depth], path_actions[depth], path_players[depth] = node, act, cur_player
+            depth += 1
+            cur_player = board.make_move(act, cur_player, False)
+            result = board.check_end_game()
+            if children[node, act] < 0:
+                children[node, act] = nb_nodes
+                nb_nodes += 1
+                break
+            node = children[node, act]
+
+        # Random rollout
+        while not result.any():
+            valids = np.flatnonzero(board.valid_moves(cur_player))
+            cur_player = board.make_move(valids[np.random.randint(valids.size)], cur_player, False)
+            result = board.check_end_game()
+
+        # Backpropagation, a draw is worth its small positive utility
+        for d in range(depth):
+            visits[path_nodes[d], path_actions[d]] += 1
+            wins[path_nodes[d], path_actions[d]] += max(result[path_players[d]], 0.)
+
+    return visits[0], wins[0]
+
+
+class Assignment:
+    def __init__(self, game: SplendorGame, determinizations=8, playouts=300, exploration=1.4, threads=None):
+        self.game = game
+        self.random = random.Generator(random.PCG64(27))
+        self.player_id = -1
+
+        self.determinizations = determinizations
+        self.playouts = playouts
+        self.exploration = exploration
+        self.executor = _shared_executor(threads or min(determinizations, os.cpu_count() or 1))
+        self.book = OpeningBook.load_if_exists()
+        # Exact chance nodes: a win found with sampled outcomes (by_color) would not be a proof
+        self.endgame = EndgameSolver(game, by_color=False)
+
+    def __call__(self, *args, **kwargs):
+        return self.search(*args, **kwargs)
+
+    def search(self, board) -> int:
+        """
+        Information-set MCTS: sample K determinizations of the hidden decks, search
+        each one in its own thread and vote using aggregated root visits.
+        """
+        if self.book is not None:
+            action = self.book.lookup(board, self.game.valid_moves(board, self.player_id), self.player_id)
+            if action is not None:
+                return action
+
+        if self.endgame.applies(board):
+            action, value = self.endgame.solve(board, self.player_id)
+            if value > 0.99:  # Proven win, otherwise let ISMCTS decide
+                return action
+
+        state = board.copy()
+        nb_actions = self.game.total_number_of_actions()
+        seeds = self.random.integers(2 ** 31 - 1, size=self.determinizations)
+        futures = [self.executor.submit(determinized_uct, state, self.game.num_players, self.player_id,
+                                        self.playouts, self.exploration, seed, nb_actions) for seed in seeds]
+
+        visits = np.zeros(nb_actions, dtype=np.float32)
+        for future in futures:
+            visits += future.result()[0]
+
+        valids = self.game.valid_moves(board, self.player_id)
+        visits[valids == 0] = -1
+        return int(np.argmax(visits))
+
+    def collect_action_done(self, board, player, action):
+        pass
@@ -0,0 +1,133 @@
+import threading
+
+import numpy as np
+from numpy import random
+
+from search.tree import SearchTree
+from splendor.game import SplendorGame
+
+AGENT_SPEC = {
+    'threads': 2,
+    'memory_mb': 48,
+    'assignment': False,
+}
+
+
+class Assignment:
+    def __init__(self, game: SplendorGame, playouts=1000, exploitation=0.5, background=False,
+                 max_memory=32 << 20, eviction='lru'):
+        """
+        Input:
+            playouts: number of playouts added to the tree at each search
+            exploitation: probability of following the most visited child during selection, instead of a random one
+            background: True to ponder in a background thread between collect_action_done and the next search
+            max_memory, eviction: size in bytes of the node pool, and eviction policy when it is full (see SearchTree)
+        """
+        self.game = game
+        # Private game, so that pondering never uses the scratch board shared with other agents
+        self.simulator = SplendorGame(game.num_players)
+        self.random = random.Generator(random.PCG64(27))
+        self.player_id = -1
+        self.playouts = playouts
+        self.exploitation = exploitation
+        self.background = background
+        self.tree = SearchTree(max_memory=max_memory, eviction=eviction)
+        self._stop = threading.Event()
+        self._pondering = None
+
+    def __call__(self, *args, **kwargs):
+        return self.search(*args, **kwargs)
+
+    def reset(self):
+        self._stop_pondering()
+        self.tree.clear()
+
+    def selection(self, board):
+        # Exploitation with probability self.exploitation, else exploration (Note that this is not UCB-1),
+        # until a new node is expanded
+        tree = self.tree
+        node = tree.root
+        ply = 0
+        player = tree.nodes['player'][node]
+        while ply < 10:
+            actions, visits, _ = tree.action_stats(node)
+            if not len(actions):
+                break
+            if self.random.random() < self.exploitation:
+                act = actions[int(np.argmax(visits))]
+            else:
+                act = self.random.choice(actions)
+
+            expanded = tree.child(node, act) >= 0
+            board, player = self.simulator.next_state_of(board, player, act)
+            node = tree.get_child(node, act, player)
+            ply += 1
+
+            if not expanded:
+                tree.set_valid_moves(node, self.simulator.valid_moves(board, player))
+                break
+
+        return board, player, node
+
+    def rollout(self, board, player) -> int:
+        valids = [a for a, v in enumerate(self.simulator.valid_moves(board, player)) if v == 1]
+        return self.random.choice(valids)
+
+    def expand(self, board, player, node):
+        while not self.simulator.game_ended(board).any():
+            act = self.rollout(board, player)
+            board, player = self.simulator.next_state_of(board, player, act)
+
+        is_win = self.simulator.game_ended(board)[self.player_id] > 0
+        self.tree.backpropagate(node, int(is_win))
+
+    def playout(self, board):
+        selection_board, selection_player, node = self.selection(board)
+        self.expand(selection_board, selection_player, node)
+
+    def _ensure_root(self, board, player):
+        if self.tree.root < 0:
+            self.tree.set_root(player)
+        # A promoted root was expanded on a simulated board (sampled cards), so its valid moves may differ
+        self.tree.restrict_root(self.simulator.valid_moves(board, player))
+
+    def ponder(self, board, player, stop):
+        """
+        Add playouts to the tree of the current position until stop (a threading.Event) is set
+        """
+        self._ensure_root(board, player)
+        while not stop.is_set():
+            self.playout(board)
+
+    def _stop_pondering(self):
+        if self._pondering is not None:
+            self._stop.set()
+            self._pondering.join()
+            self._pondering = None
+            self._stop.clear()
+
+    def search(self, board) -> int:
+        self._stop_pondering()
+        self._ensure_root(board, self.player_id)
+
+        for _ in range(self.playouts):
+            self.playout(board)
+
+        # Choose the most frequently visited path for this node
+        actions, visits, _ = self.tree.action_stats(self.tree.root)
+        return actions[int(np.argmax(visits))]
+
+    def collect_action_done(self, board, player, action):
+        self._stop_pondering()
+        if self.tree.root >= 0:
+            assert self.tree.nodes['player'][self.tree.root] == player, \
+                f'{self.tree.nodes["player"][self.tree.root]} vs {player}'
+
+        next_player = self.game.next_player_of(player)
+        self.tree.promote(action, next_player)
+        self._ensure_root(board, next_player)
+
+        if self.background:
+            self._pondering = threading.Thread(target=self.ponder, args=(board.copy(), next_player, self._stop),
+                                               daemon=True)
+            self._pondering.start()
@@ -0,0 +1,128 @@
+import numpy as np
+from numpy import random
+
+from search.evaluator import MLPEvaluator, DEFAULT_WEIGHTS
+from splendor.game import SplendorGame
+
+AGENT_SPEC = {
+    'threads': 1,
+    'memory_mb': 128,
+    'assignment': False,
+}
+
+
+class Assignment:
+    def __init__(self, game: SplendorGame, simulations=256, batch_size=64, cpuct=1.5, weights=DEFAULT_WEIGHTS):
+        self.game = game
+        self.random = random.Generator(random.PCG64(27))
+        self.player_id = -1
+
+        self.simulations = simulations
+        self.batch_size = batch_size
+        self.cpuct = cpuct
+        # Without trained weights, policy is uniform and values are zero
+        self.evaluator = MLPEvaluator.load_if_exists(weights, game.num_players)
+        # board bytes -> (prior, visits, value sum, valid moves) of each action
+        self.tree = {}
+
+    def __call__(self, *args, **kwargs):
+        return self.search(*args, **kwargs)
+
+    def _select(self, board, player):
+        """
+        Descend the tree from board until a leaf is reached.
+
+        Returns:
+            path: list of (node, action, player) traversed
+            board, player: leaf to evaluate
+            utilities: utility of each player if leaf is terminal, else None
+        """
+        path = []
+        while True:
+            utilities = self.game.game_ended(board)
+            if utilities.any():
+                return path, board, player, utilities
+            node = self.tree.get(board.tobytes())
+            if node is None:
+                return path, board, player, None
+
+            prior, visits, values, valids = node
+            q = np.divide(values, visits, out=np.zeros_like(values), where=visits > 0)
+            u = q + self.cpuct * prior * np.sqrt(visits.sum() + 1) / (1 + visits)
+            action = int(np.argmax(np.where(valids, u, -np.inf)))
+            path.append((node, action, player))
+            board, player = self.game.next_state_of(board, player, action)
+
+    def _evaluate(self, leaves):
+        # Batched inference over all leaves collected in this round
+        n = self.game.num_players
+        canonical = np.stack([self.game.canonical_state(board, player).copy() for board, player in leaves])
+        valids = np.stack([self.game.valid_moves(board, player) for board, player in leaves])
+        if self.evaluator is None:
+            policies = valids / valids.sum(axis=1, keepdims=True)
+            values = np.zeros((len(leaves), n), dtype=np.float32)
+        else:
+            policies, values = self.evaluator.predict(canonical, valids)
+
+        results = []
+        for (board, player), policy, value, valid in zip(leaves, policies, values, valids):
+            self.tree[board.tobytes()] = (policy.astype(np.float32), np.zeros(len(valid), dtype=np.float32),
+                                          np.zeros(len(valid), dtype=np.float32), valid)
+            # Convert canonical order of values back to player indexes
+            results.append(np.roll(value, player))
+        return results
+
+    def run_simulations(self, board, player):
+        if board.tobytes() not in self.tree and not self.game.game_ended(board).any():
+            self._evaluate([(board.copy(), player)])
+        for _ in range(0, self.simulations, self.batch_size):
+            pending = []
+            for _ in range(self.batch_size):
+                path, leaf, leaf_player, utilities = self._select(board, player)
+                if utilities is not None:
+                    self._backpropagate(path, utilities)
+                    continue
+                # Virtual loss, so that next selections of this batch explore other paths
+                for node, action, p in path:
+                    node[1][action] += 1
+                    node[2][action] -= 1
+                pending.append((path, leaf.copy(), leaf_player))
+
+            if pending:
+                values = self._evaluate([(leaf, leaf_player) for _, leaf, leaf_player in pending])
+                for (path, _, _), value in zip(pending, values):
+                    for node, action, p in path:
+                        node[1][action] -= 1
+                        node[2][action] += 1
+                    self._backpropagate(path, value)
+
+    @staticmethod
+    def _backpropagate(path, utilities):
+        for node, action, p in path:
+            node[1][action] += 1
+            node[2][action] += utilities[p]
+
+    def policy(self, board, player, temperature=1.):
+        """
+        Returns: visit counts at root turned into a probability distribution over actions
+        """
+        self.tree = {}
+        self.run_simulations(board, player)
+        root = self.tree.get(board.tobytes())
+        if root is None:  # Board is terminal
+            policy = np.zeros(self.game.total_number_of_actions(), dtype=np.float64)
+            policy[60] = 1.
+            return policy
+        visits = root[1].astype(np.float64)
+        if temperature == 0:
+            policy = (visits == visits.max()).astype(np.float64)
+        else:
+            policy = visits ** (1 / temperature)
+        return policy / policy.sum()
+
+    def search(self, board) -> int:
+        policy = self.policy(board, self.player_id, temperature=0)
+        return int(self.random.choice(len(policy), p=policy))
+
+    def collect_action_done(self, board, player, action):
+        pass
@@ -0,0 +1,141 @@
+"""
+Self-play training pipeline.
+
+Actor processes play games with the PUCT agent and push (state, policy, outcome)
+samples into a shared-memory replay buffer, each in its own ring segment. The
+learner, in main process, samples minibatches to update the evaluator; every few
+steps a gating match between new and best weights decides whether new weights
+are published back to actors.
+
+Run with:
+    python -m search.selfplay --actors 8 --steps 20000
+"""
+import argparse
+import copy
+import os
+import time
+from multiprocessing import Event, Process, Value
+from pathlib import Path
+
+import numpy as np
+
+from search.evaluator import MLPEvaluator, DEFAULT_WEIGHTS
+from search.replay_buffer import SharedReplayBuffer
+from search.search_puct import Assignment as PUCTAgent
+from search.train_evaluator import self_play_game
+from splendor.arena import Arena
+from splendor.game import SplendorGame
+
+
+def publish(evaluator, path, version):
+    # Write then rename, so that actors never load a partially written file
+    tmp_path = Path(path).with_suffix('.tmp.npz')
+    evaluator.save(tmp_path)
+    os.replace(tmp_path, path)
+    with version.get_lock():
+        version.value += 1
+
+
+def actor(buffer, weights, version, stop, seed, simulations):
+    # seed is also the index of the buffer segment owned by this actor
+    np.random.seed(seed)
+    game = SplendorGame(buffer.num_players)
+    agent = PUCTAgent(game, simulations=simulations, weights=weights)
+    loaded_version = version.value
+    while not stop.is_set():
+        if version.value != loaded_version:
+            loaded_version = version.value
+            agent.evaluator = MLPEvaluator.load(weights)
+        buffer.extend(*self_play_game(game, agent), producer=seed)
+
+
+def gating(game, candidate, best, games, simulations):
+    """
+    Returns: win rate of candidate weights against best weights, seats being rotated
+    """
+    arena = Arena(game, *(['puct'] * game.num_players))
+    arena.player_names = tuple(['candidate'] + ['best'] * (game.num_players - 1))
+    for player, name in zip(arena.players, arena.player_names):
+        player.evaluator = candidate if name == 'candidate' else best
+        player.simulations = simulations
+
+    wins = 0.
+    for _ in range(games):
+        game.reset()
+        arena.rotate_players()
+        winners = arena.play()
+        if 'candidate' in winners:
+            wins += 1. / len(winners)
+    return wins / games
+
+
+def train(num_players=2, actors=None, steps=20000, capacity=200000, batch_size=64, lr=1e-3, warmup=5000,
+          gating_every=1000, gating_games=20, threshold=0.55, simulations=128, weights=DEFAULT_WEIGHTS,
+          priority_alpha=0., spill=None):
+    actors = actors or max(os.cpu_count() - 1, 1)
+    best = MLPEvaluator.load_if_exists(weights, num_players) or MLPEvaluator(num_players)
+    candidate = copy.deepcopy(best)
+    version = Value('l', 0)
+    publish(best, weights, version)
+
+    buffer = SharedReplayBuffer(capacity, num_players, producers=actors, path=spill)
+    stop = Event()
+    processes = [Process(target=actor, args=(buffer, weights, version, stop, seed, simulations), daemon=True)
+                 for seed in range(actors)]
+    for process in processes:
+        process.start()
+
+    game = SplendorGame(num_players)
+    try:
+        while len(buffer) < warmup:
+            time.sleep(1)
+        losses = []
+        batch = None
+        for step in range(1, steps + 1):
+            *batch, indexes, is_weights = buffer.sample(batch_size, alpha=priority_alpha, out=batch)
+            batch = tuple(batch)
+            # Importance-sampling weights correct the bias of prioritized sampling
+            losses.append(candidate.train_step(*batch, lr=lr, weights=is_weights))
+            if priority_alpha > 0:
+                _, predicted = candidate.predict(batch[0])
+                buffer.update_priorities(indexes, np.abs(predicted - batch[2]).mean(axis=1))
+            if step % gating_every == 0:
+                win_rate = gating(game, candidate, best, gating_games, simulations)
+                policy_loss, value_loss = np.mean(losses, axis=0)
+                losses = []
+                print(f'Step {step}: {buffer.total_written} samples, policy loss {policy_loss:.4f}, '
+                      f'value loss {value_loss:.4f}, win rate vs best {win_rate * 100:.1f}%')
+                if win_rate >= threshold:
+                    best = copy.deepcopy(candidate)
+                    publish(best, weights, version)
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=60)
+            if process.is_alive():
+                process.terminate()
+        buffer.close()
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Self-play training of the MLP evaluator')
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--actors', type=int, default=None, help='Number of actor processes, default nb of cores - 1')
+    parser.add_argument('--steps', type=int, default=20000, help='Number of learner minibatches')
+    parser.add_argument('--capacity', type=int, default=200000, help='Number of samples in replay buffer')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--warmup', type=int, default=5000, help='Samples needed before learning starts')
+    parser.add_argument('--gating-every', type=int, default=1000)
+    parser.add_argument('--gating-games', type=int, default=20)
+    parser.add_argument('--threshold', type=float, default=0.55, help='Win rate needed to publish new weights')
+    parser.add_argument('--simulations', type=int, default=128)
+    parser.add_argument('--weights', type=Path, default=DEFAULT_WEIGHTS)
+    parser.add_argument('--priority-alpha', type=float, default=0., help='0 for uniform replay, else prioritized')
+    parser.add_argument('--spill', type=Path, default=None, help='Memory-mapped file to store replay buffer')
+    args = parser.parse_args()
+
+    train(args.players, args.actors, args.steps, args.capacity, args.batch_size, args.lr, args.warmup,
+          args.gating_every, args.gating_games, args.threshold, args.simulations, args.weights,
+          args.priority_alpha, args.spill)
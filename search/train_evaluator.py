@@ -0,0 +1,84 @@
+"""
+Train the MLP evaluator over self-play records.
+
+Records are .npz files containing:
+    states: canonical boards, shape (N, rows, 7), int8
+    policies: MCTS visit distributions, shape (N, 61), float32
+    values: final utility of each player in canonical order, shape (N, num_players), float32
+
+Generate records with the PUCT agent and train with:
+    python -m search.train_evaluator --selfplay 50 --records records.npz
+    python -m search.train_evaluator --records records.npz --epochs 10
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+from tqdm import trange
+
+from search.evaluator import MLPEvaluator, DEFAULT_WEIGHTS
+from search.search_puct import Assignment as PUCTAgent
+from splendor.game import SplendorGame
+
+
+def self_play_game(game, agent, temperature=1., symmetries=True):
+    """
+    Play one game where every player is the given agent.
+
+    Returns:
+        states, policies, values: records of the game, see module documentation
+    """
+    n = game.num_players
+    history = []
+    board, player = game.initial_state(), 0
+    while not game.game_ended(board).any():
+        policy = agent.policy(board, player, temperature)
+        canonical = game.canonical_state(board, player).copy()
+        if symmetries:
+            game.board.copy_state(canonical, False)
+            valids = game.valid_moves(canonical, 0).astype(np.float32)
+            for state, sym_policy, _ in game.board.get_symmetries(policy, valids):
+                history.append((state, sym_policy, player))
+        else:
+            history.append((canonical, policy, player))
+        action = int(np.random.choice(len(policy), p=policy))
+        board, player = game.next_state_of(board, player, action)
+
+    utilities = game.game_ended(board)
+    states = np.stack([state for state, _, _ in history])
+    policies = np.stack([policy for _, policy, _ in history]).astype(np.float32)
+    values = np.stack([np.roll(utilities, -player) for _, _, player in history]).astype(np.float32)
+    return states, policies, values
+
+
+def load_records(paths):
+    records = [np.load(path) for path in paths]
+    return tuple(np.concatenate([r[name] for r in records]) for name in ('states', 'policies', 'values'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train MLP evaluator over self-play records')
+    parser.add_argument('--records', type=Path, nargs='+', required=True)
+    parser.add_argument('--selfplay', type=int, default=0, help='Generate records from N games instead of training')
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--weights', type=Path, default=DEFAULT_WEIGHTS)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    args = parser.parse_args()
+
+    if args.selfplay:
+        game = SplendorGame(args.players)
+        agent = PUCTAgent(game, weights=args.weights)
+        games = [self_play_game(game, agent) for _ in trange(args.selfplay, desc='Self-play')]
+        states, policies, values = (np.concatenate(arrays) for arrays in zip(*games))
+        np.savez_compressed(args.records[0], states=states, policies=policies, values=values)
+        print(f'{states.shape[0]} records saved to {args.records[0]}')
+    else:
+        states, policies, values = load_records(args.records)
+        evaluator = MLPEvaluator.load_if_exists(args.weights, values.shape[1]) or MLPEvaluator(values.shape[1])
+        for epoch in range(args.epochs):
+            policy_loss, value_loss = evaluator.fit(states, policies, values, epochs=1,
+                                                    batch_size=args.batch_size, lr=args.lr)
+            print(f'Epoch {epoch}: policy loss {policy_loss:.4f}, value loss {value_loss:.4f}')
+        evaluator.save(args.weights)
@@ -0,0 +1,207 @@
+"""
+Array-based search tree, reused across moves.
+
+All nodes live in one structured NumPy array; children of a node are linked
+through first_child/next_sibling. The statistics of the edge from a node to its
+child (visits, wins) are stored in the child. When a move is played, the
+subtree below it is promoted to root and every other node goes back to the free
+list, so memory only holds statistics that can still be used.
+
+With max_memory, the node array is preallocated once and never grows: when it is
+full, a batch of leaves (least recently updated, or least visited) is evicted to
+make room for new nodes.
+"""
+import numpy as np
+
+node_dtype = np.dtype([
+    ('parent', np.int32),
+    ('first_child', np.int32),
+    ('next_sibling', np.int32),
+    ('action', np.int8),
+    ('player', np.int8),  # -1 for a free node
+    ('valids', np.uint64),  # bitfield of valid actions, 0 if not known yet
+    ('visits', np.uint32),
+    ('wins', np.float32),
+    ('last_used', np.uint32),  # clock of the last playout going through the node
+])
+
+evictions = ('lru', 'visits')
+
+
+class SearchTree:
+    def __init__(self, capacity=4096, max_memory=None, eviction='lru'):
+        """
+        Input:
+            capacity: initial number of nodes, doubled each time the tree is full (if max_memory is None)
+            max_memory: size in bytes of the preallocated node pool, None for an unbounded tree
+            eviction: 'lru' to evict least recently used leaves first, 'visits' for least visited leaves first
+        """
+        assert eviction in evictions, f'eviction should be one of {evictions}'
+        if max_memory is not None:
+            capacity = max_memory // node_dtype.itemsize
+        self.bounded = max_memory is not None
+        self.eviction = eviction
+        self.nodes = np.zeros(capacity, dtype=node_dtype)
+        self.evicted = 0
+        self.clear()
+
+    def clear(self):
+        self.nodes['player'] = -1
+        self.free = list(range(len(self.nodes) - 1, -1, -1))
+        self.root = -1
+        self.clock = 0
+
+    def __len__(self):
+        return len(self.nodes) - len(self.free)
+
+    def _grow(self):
+        size = len(self.nodes)
+        self.nodes = np.concatenate([self.nodes, np.zeros(size, dtype=node_dtype)])
+        self.nodes['player'][size:] = -1
+        self.free = list(range(2 * size - 1, size - 1, -1)) + self.free
+
+    def new_node(self, player, parent=-1, action=-1):
+        if not self.free:
+            if self.bounded:
+                self._evict(parent)
+            else:
+                self._grow()
+        index = self.free.pop()
+        sibling = -1
+        if parent >= 0:
+            sibling = self.nodes['first_child'][parent]
+            self.nodes['first_child'][parent] = index
+        self.nodes[index] = (parent, -1, sibling, action, player, 0, 0, 0., self.clock)
+        return index
+
+    def _evict(self, protected):
+        # Free 1/16 of the pool, taking leaves only (neither root nor the node being expanded)
+        nodes = self.nodes
+        leaves = (nodes['player'] >= 0) & (nodes['first_child'] < 0)
+        leaves[self.root] = False
+        if protected >= 0:
+            leaves[protected] = False
+        candidates = np.flatnonzero(leaves)
+        if not len(candidates):
+            raise MemoryError('Search tree is too small to hold a single path')
+
+        count = min(max(len(nodes) // 16, 1), len(candidates))
+        keys = nodes['last_used' if self.eviction == 'lru' else 'visits'][candidates]
+        victims = candidates[np.argpartition(keys, count - 1)[:count]]
+        for victim in victims:
+            self._unlink(victim)
+        nodes['player'][victims] = -1
+        self.free = victims.tolist()
+        self.evicted += count
+
+    def _unlink(self, node):
+        parent = self.nodes['parent'][node]
+        following = self.nodes['next_sibling'][node]
+        index = self.nodes['first_child'][parent]
+        if index == node:
+            self.nodes['first_child'][parent] = following
+            return
+        while self.nodes['next_sibling'][index] != node:
+            index = self.nodes['next_sibling'][index]
+        self.nodes['next_sibling'][index] = following
+
+    def set_root(self, player):
+        self.clear()
+        self.root = self.new_node(player)
+        return self.root
+
+    def child(self, node, action):
+        """
+        Returns: index of the child reached by action, -1 if not expanded yet
+        """
+        index = self.nodes['first_child'][node]
+        while index >= 0 and self.nodes['action'][index] != action:
+            index = self.nodes['next_sibling'][index]
+        return int(index)
+
+    def get_child(self, node, action, player):
+        index = self.child(node, action)
+        return index if index >= 0 else self.new_node(player, node, action)
+
+    def is_leaf(self, node):
+        return self.nodes['first_child'][node] < 0
+
+    def set_valid_moves(self, node, valid_moves):
+        self.nodes['valids'][node] = sum(1 << a for a, v in enumerate(valid_moves) if v)
+
+    def valid_actions(self, node):
+        valids = int(self.nodes['valids'][node])
+        return [a for a in range(valids.bit_length()) if valids >> a & 1]
+
+    def action_stats(self, node):
+        """
+        Returns: valid actions of node (ascending), and visits and wins of each of them
+        """
+        actions = self.valid_actions(node)
+        visits, wins = np.zeros(len(actions), dtype=np.uint32), np.zeros(len(actions), dtype=np.float32)
+        position = {a: i for i, a in enumerate(actions)}
+        index = self.nodes['first_child'][node]
+        while index >= 0:
+            i = position[self.nodes['action'][index]]
+            visits[i], wins[i] = self.nodes['visits'][index], self.nodes['wins'][index]
+            index = self.nodes['next_sibling'][index]
+        return actions, visits, wins
+
+    def backpropagate(self, node, win):
+        self.clock += 1
+        while self.nodes['parent'][node] >= 0:
+            self.nodes['visits'][node] += 1
+            self.nodes['wins'][node] += win
+            self.nodes['last_used'][node] = self.clock
+            node = self.nodes['parent'][node]
+
+    def promote(self, action, player):
+        """
+        Make the child reached by action the new root, and reclaim all nodes outside of its subtree.
+
+        Returns: number of reclaimed nodes
+        """
+        used = len(self)
+        new_root = self.child(self.root, action) if self.root >= 0 else -1
+        if new_root < 0:
+            self.set_root(player)
+            return used
+
+        self.nodes['parent'][new_root] = -1
+        self.nodes['next_sibling'][new_root] = -1
+        self.root = new_root
+        self._reclaim()
+        return used - len(self)
+
+    def restrict_root(self, valid_moves):
+        """
+        Set the valid moves of root (e.g. from the real board, when root was reached in a simulation),
+        and reclaim the subtrees of its children whose action is not valid anymore.
+        """
+        self.set_valid_moves(self.root, valid_moves)
+        valids = int(self.nodes['valids'][self.root])
+        index, removed = self.nodes['first_child'][self.root], False
+        while index >= 0:
+            following = self.nodes['next_sibling'][index]
+            if not valids >> int(self.nodes['action'][index]) & 1:
+                self._unlink(index)
+                self.nodes['parent'][index] = -1
+                removed = True
+            index = following
+        if removed:
+            self._reclaim()
+
+    def _reclaim(self):
+        # Free every node outside of the subtree of root, marking the subtree one level per iteration
+        parents = self.nodes['parent']
+        has_parent = (self.nodes['player'] >= 0) & (parents >= 0)
+        keep = np.zeros(len(self.nodes), dtype=np.bool_)
+        keep[self.root] = True
+        while True:
+            marked = keep | (has_parent & keep[parents])
+            if (marked == keep).all():
+                break
+            keep = marked
+
+        self.nodes['player'][~keep] = -1
+        self.free = np.flatnonzero(~keep)[::-1].tolist()
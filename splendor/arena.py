@@ -1,6 +1,5 @@
 import threading
 from collections import Counter
-from importlib import import_module
 from time import sleep, time
 from traceback import format_exc
 
@@ -9,6 +8,8 @@ try:
 except ImportError:
     import _thread as thread
 
+from search.load import create_agent
+
 
 def exit_after(s):
     def outer(fn):
@@ -29,7 +30,7 @@ class Arena:
     An Arena class where any 2 ~ 4 agents can be play in turn against each other.
     """
 
-    def __init__(self, game, *players):
+    def __init__(self, game, *players, agents=None):
         """
         Input:
             player 1,2: two functions that takes board as input, return action
@@ -40,24 +41,34 @@ class Arena:
 
         see othello/OthelloPlayers.py for an example. See main.py for pitting
         human players/other baselines with each other.
+
+        If agents is given, these already instantiated agents are used (one per
+        player name) instead of creating new ones.
         """
         self.game = game
         self.player_names = players
-        self.players = [self.create_player(p) for p in players]
+        self.players = list(agents) if agents is not None else [self.create_player(p) for p in players]
+
+    @staticmethod
+    def create_player_for(game, name):
+        # Initialize algorithm, name being an agent configuration such as 'ismcts:playouts=1000'
+        return create_agent(game, name)
 
     def create_player(self, name):
-        # Initialize algorithm
-        module = import_module(f'search.search_{name}' if not name.startswith('human') else 'search.human')
-        return module.Assignment(self.game)
+        return self.create_player_for(self.game, name)
 
     def rotate_players(self):
         self.players = self.players[1:] + self.players[:1]
         self.player_names = self.player_names[1:] + self.player_names[:1]
 
-    def play(self, verbose=False, wait=5):
+    def play(self, verbose=False, wait=5, telemetry=None, spectator=None):
         """
         Executes one episode of a game.
 
+        Input:
+            telemetry: optional Telemetry object recording latency and engine calls of each decision
+            spectator: optional Spectator object publishing each move (game loop doesn't wait for viewers)
+
         Returns:
             List of winners (player names)
             either
@@ -65,16 +76,30 @@ class Arena:
             or
                 draw result returned from the game that is neither 1, -1, nor 0.
         """
-
+        try:
+            return self._play(verbose, wait, telemetry, spectator)
+        finally:
+            # Never leave the shared game instrumented, even if the game raised
+            if telemetry is not None:
+                telemetry.restore()
+
+    def _play(self, verbose, wait, telemetry, spectator):
         retired_players = set()
 
-        # Assign ID to each player
+        # Assign ID to each player, and forget what agents learnt during previous game
         for p, player in enumerate(self.players):
             player.player_id = p
+            if hasattr(player, 'reset'):
+                player.reset()
+
+        if telemetry is not None:
+            telemetry.start_game(self.game, self.player_names)
 
         cur_player = 0
         failures = Counter()
         board = self.game.initial_state()
+        if spectator is not None:
+            spectator.start_game(self.player_names, board)
         it = 0
         while not self.game.game_ended(board).any():
             if len(retired_players) == len(self.players) - 1:
@@ -93,7 +118,11 @@ class Arena:
             else:
                 assert self.players[cur_player].player_id == cur_player
                 try:
+                    if telemetry is not None:
+                        telemetry.begin_decision()
                     action = exit_after(300)(self.players[cur_player].search)(board)
+                    if telemetry is not None:
+                        telemetry.end_decision(it, cur_player, self.player_names[cur_player], action)
                 except Exception as e:
                     action = 60
                     failures.update([cur_player])
@@ -126,6 +155,8 @@ class Arena:
 
             # Notify a player's action to the board and all players
             board, next_player = self.game.next_state_of(board, cur_player, action)
+            if spectator is not None:
+                spectator.move(it, cur_player, action, board)
             for player in self.players:
                 player.collect_action_done(board, cur_player, action)
             cur_player = next_player
@@ -138,6 +169,11 @@ class Arena:
         else:
             result = [p for i, p in enumerate(self.player_names) if i not in retired_players]
 
+        if telemetry is not None:
+            telemetry.end_game(result)
+        if spectator is not None:
+            spectator.end_game(result)
+
         if verbose:
             self.game.print_board(board, self.player_names)
             print("Game over: Turn ", str(it), "Winners ", result)
@@ -0,0 +1,182 @@
+"""
+Asynchronous Arena, interleaving many games on one event loop.
+
+Decisions of agents run in an executor (threads by default) and are awaited
+with a deadline, so a slow agent only delays its own game. Agents may define an
+optional ponder(board, player, stop) method: it is started in the executor
+whenever another player is thinking, and must return soon after the
+threading.Event stop is set. A ponder is always finished before the agent is
+notified of the move (collect_action_done) or asked to decide. An agent missing
+its deadline counts a failure (3 failures retire it, as in Arena) and isn't
+notified nor asked anything until its late search returns; it is then reset,
+since it missed the moves played meanwhile. An exception raised by reset() or
+collect_action_done() counts a failure too.
+
+A search can't be interrupted: one which never returns keeps its executor
+thread busy forever (see run_games).
+
+Each agent gets its own SplendorGame, since the game object keeps a scratch
+board which can't be shared between concurrent searches.
+"""
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from traceback import format_exception
+
+from .arena import Arena
+from .game import SplendorGame
+
+
+class AsyncArena:
+    def __init__(self, num_players, *players, agents=None, deadline=300., ponder=True):
+        """
+        Input:
+            num_players: number of players (2, 3, 4)
+            players: name of each player, in seat order
+            agents: already instantiated agents (one per player name, each with its own game), None to create them
+            deadline: seconds given to an agent for each decision
+            ponder: False to never call ponder() of agents
+        """
+        self.game = SplendorGame(num_players)
+        self.player_names = players
+        self.players = list(agents) if agents is not None else \
+            [Arena.create_player_for(SplendorGame(num_players), p) for p in players]
+        self.deadline = deadline
+        self.ponder = ponder
+
+    def _start_pondering(self, loop, executor, board, cur_player, skipped):
+        stop = threading.Event()
+        tasks = [loop.run_in_executor(executor, player.ponder, board.copy(), cur_player, stop)
+                 for p, player in enumerate(self.players)
+                 if self.ponder and p != cur_player and p not in skipped and hasattr(player, 'ponder')]
+        return stop, tasks
+
+    async def play(self, executor=None, verbose=False):
+        """
+        Executes one episode of a game.
+
+        Input:
+            executor: concurrent.futures executor running searches, None for the loop's default executor
+
+        Returns:
+            List of winners (player names)
+        """
+        loop = asyncio.get_running_loop()
+        retired_players = set()
+        # Searches which missed their deadline: these agents are left alone until they return
+        busy = {}
+        failures = Counter()
+        board = self.game.initial_state()
+
+        def fail(p, error):
+            nonlocal board
+            failures.update([p])
+            if verbose:
+                print(f'Player {p} failure ({failures[p]}/3): {error}')
+            if failures[p] >= 3 and p not in retired_players:
+                retired_players.add(p)
+                board = self.game.retire_player(board, self.players[p])
+
+        def call(p, function, *args):
+            # Run a callback of agent p, an exception counting a failure
+            try:
+                function(*args)
+            except Exception as e:
+                fail(p, ''.join(format_exception(type(e), e, e.__traceback__)))
+
+        for p, player in enumerate(self.players):
+            player.player_id = p
+            if hasattr(player, 'reset'):
+                call(p, player.reset)
+
+        cur_player = 0
+        it = 0
+        while not self.game.game_ended(board).any():
+            if len(retired_players) == len(self.players) - 1:
+                break
+
+            it += 1
+            for p in [p for p, search in busy.items() if search.done()]:
+                # Back from a late search: agent missed moves in between, so it starts over
+                del busy[p]
+                if hasattr(self.players[p], 'reset'):
+                    call(p, self.players[p].reset)
+            if cur_player in retired_players:
+                action = 60
+            else:
+                stop, pondering = self._start_pondering(loop, executor, board, cur_player, retired_players | set(busy))
+                error = None
+                if cur_player in busy:
+                    error = 'Still thinking on a previous turn.'
+                else:
+                    search = loop.run_in_executor(executor, self.players[cur_player].search, board.copy())
+                    done, _ = await asyncio.wait({search}, timeout=self.deadline)
+                    if not done:
+                        busy[cur_player] = search
+                        error = f'Used more than {self.deadline} seconds to think.'
+                    elif search.exception() is not None:
+                        e = search.exception()
+                        error = ''.join(format_exception(type(e), e, e.__traceback__))
+                stop.set()
+                await asyncio.gather(*pondering, return_exceptions=True)
+
+                if error is None:
+                    action = search.result()
+                else:
+                    action = 60
+                    fail(cur_player, error)
+
+                if self.game.valid_moves(board, cur_player)[action] == 0:
+                    action = 60
+
+            board, next_player = self.game.next_state_of(board, cur_player, action)
+            for p, player in enumerate(self.players):
+                if p not in busy:
+                    call(p, player.collect_action_done, board, cur_player, action)
+            cur_player = next_player
+
+        if len(retired_players) < len(self.players) - 1:
+            result = [self.player_names[p] for p, utility in enumerate(self.game.game_ended(board).tolist())
+                      if utility > 0]
+        else:
+            result = [p for i, p in enumerate(self.player_names) if i not in retired_players]
+
+        if verbose:
+            print(f'Game over: Turn {it} Winners {result}')
+        return result
+
+
+async def play_games(seatings, executor=None, concurrency=100, deadline=300., ponder=True):
+    """
+    Input:
+        seatings: list of tuples of player names, in seat order, one per game
+        concurrency: maximal number of games being played at the same time
+
+    Returns:
+        list of winners of each game, in the order of seatings (the exception instead, for a game
+        which raised one, so that a failing game doesn't abort the others)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def play_one(seating):
+        async with semaphore:
+            arena = AsyncArena(len(seating), *seating, deadline=deadline, ponder=ponder)
+            return await arena.play(executor)
+
+    return await asyncio.gather(*(play_one(seating) for seating in seatings), return_exceptions=True)
+
+
+def run_games(seatings, workers=None, **kwargs):
+    """
+    Play all games of seatings concurrently from synchronous code (see play_games).
+
+    Returns as soon as all games are over, without waiting for late searches. A search which
+    never returns can't be cancelled: its thread keeps running, and the interpreter waits for it
+    at exit (as for any thread of a concurrent.futures executor).
+    """
+    executor = ThreadPoolExecutor(workers)
+    try:
+        return asyncio.run(play_games(seatings, executor, **kwargs))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,98 @@
+"""
+Evaluation of 2 to 4 agents with balanced seats.
+
+Games are scheduled in blocks of n seatings forming a latin square (each agent
+plays once in each seat), blocks going through every cyclic order of agents, so
+that both seat and neighbour effects are balanced. Games are batched on the
+Scheduler workers. Results are reported per agent and per seat, with Wilson
+score confidence intervals.
+
+Run with:
+    python -m splendor.evaluation greedy random highRollerV1 --games 60
+"""
+import argparse
+import math
+from collections import defaultdict
+from itertools import permutations
+
+from tqdm import tqdm
+
+from .scheduler import Scheduler
+
+
+def balanced_seatings(players, games):
+    """
+    Returns: list of seatings (tuples of names in seat order), rounded up to a multiple of len(players)
+    """
+    n = len(players)
+    # All orders with first player fixed, each expanded to its n rotations (a latin square)
+    orders = [(players[0],) + rest for rest in permutations(players[1:])]
+    blocks = [[order[r:] + order[:r] for r in range(n)] for order in orders]
+    seatings = []
+    while len(seatings) < games:
+        seatings += blocks[(len(seatings) // n) % len(blocks)]
+    return seatings
+
+
+def wilson_interval(wins, games, z=1.96):
+    if games == 0:
+        return 0., 1.
+    p = wins / games
+    center = (p + z * z / (2 * games)) / (1 + z * z / games)
+    half_width = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / (1 + z * z / games)
+    return max(center - half_width, 0.), min(center + half_width, 1.)
+
+
+def evaluate(players, games, scheduler, batch_size=8):
+    """
+    Input:
+        players: names of the 2 to 4 agents playing every game
+        games: minimal number of games, rounded up to keep seats balanced
+
+    Returns:
+        dictionary, for each agent, of its win rate, confidence interval and win rate per seat.
+        A game won by several players counts as a fraction of win for each of them.
+    """
+    seatings = balanced_seatings(list(players), games)
+    wins, played = defaultdict(float), defaultdict(int)
+    for seating, winners in tqdm(scheduler.run_games(seatings, batch_size), total=len(seatings), desc='Games'):
+        for seat, name in enumerate(seating):
+            played[name, seat] += 1
+            if name in winners:
+                wins[name, seat] += 1. / len(winners)
+
+    report = {}
+    for name in players:
+        seat_wins = [wins[name, seat] for seat in range(len(players))]
+        seat_games = [played[name, seat] for seat in range(len(players))]
+        total_wins, total_games = sum(seat_wins), sum(seat_games)
+        report[name] = {
+            'games': total_games,
+            'win_rate': total_wins / total_games,
+            'interval': wilson_interval(total_wins, total_games),
+            'seats': [(w / g if g else float('nan'), wilson_interval(w, g)) for w, g in zip(seat_wins, seat_games)],
+        }
+    return report
+
+
+def print_report(report):
+    n = len(next(iter(report.values()))['seats'])
+    print(f'{"agent":12s} {"games":>6s} {"win rate":>22s}  ' + '  '.join(f'{"seat " + str(s):>22s}' for s in range(n)))
+    for name, stats in report.items():
+        low, high = stats['interval']
+        seats = '  '.join(f'{rate * 100:6.1f}% [{l * 100:5.1f},{h * 100:5.1f}]' for rate, (l, h) in stats['seats'])
+        print(f'{name[:12]:12s} {stats["games"]:6d} {stats["win_rate"] * 100:6.1f}% [{low * 100:5.1f},{high * 100:5.1f}]'
+              f'  {seats}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate 2 to 4 agents with balanced seats')
+    parser.add_argument('players', nargs='+', help='agent configurations, e.g. ismcts:playouts=1000')
+    parser.add_argument('--games', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=8)
+    args = parser.parse_args()
+    assert 2 <= len(args.players) <= 4, 'Number of players should be either 2, 3, or 4.'
+
+    with Scheduler(args.workers, agents=args.players) as scheduler:
+        print_report(evaluate(args.players, args.games, scheduler, args.batch_size))
@@ -1,7 +1,9 @@
 from typing import List
 
-from .logic import move_to_str, print_board
-from .logic_numba import Board, action_size
+import numpy as np
+
+from .logic import move_to_str, BoardRenderer, observation_dtype, fill_observation
+from .logic_numba import Board, batch_check_end_game, counter_names
 
 
 class SplendorGame:
@@ -9,10 +11,23 @@ class SplendorGame:
     This class specifies the Splendor Game class.
     """
 
-    def __init__(self, num_players=2):
+    def __init__(self, num_players=2, exchanges=False):
+        """
+        Input:
+            num_players: 2, 3, or 4
+            exchanges: True to add actions taking gems and giving back some in the same move (actions 61 and
+                       above, see logic_numba.py). Agents must then size their arrays with total_number_of_actions().
+        """
         assert 2 <= num_players <= 4, 'Number of players should be either 2, 3, or 4.'
         self.num_players = num_players
+        self.exchanges = exchanges
         self.board = Board(num_players)
+        if exchanges:
+            self.board.enable_exchanges()
+        # Set renderer.diff to True to only redraw what changed between boards
+        self.renderer = BoardRenderer()
+        self._display_board = None
+        self._observation = np.zeros((), dtype=observation_dtype(num_players))
 
     def reset(self):
         self.board.init_game()
@@ -47,6 +62,83 @@ class SplendorGame:
         next_player = self.board.make_move(action, player, deterministic)
         return self.board.get_state(), next_player
 
+    def canonical_state(self, board, player: int):
+        """
+        Input:
+            board: current board
+            player: player whose point of view is wanted
+
+        Returns:
+            a copy of board where players are swapped so that the given player is Player0
+        """
+        self.board.copy_state(board, True)
+        self.board.swap_players(player)
+        return self.board.get_state()
+
+    def chance_event_of(self, action: int):
+        """
+        Input:
+            action: int coding for an action
+
+        Returns:
+            (tier, index) of the card slot revealed after such action, index being
+            -1 when the card goes to the player's reserve (blind reservation).
+            None if the action doesn't reveal any deck card.
+        """
+        if action < 12 + 12:
+            return divmod(action % 12, 4)
+        elif action < 12 + 15:
+            return action - 12 - 12, -1
+        return None
+
+    def chance_outcomes(self, board, tier: int, by_color=False):
+        """
+        Input:
+            board: board after a deterministic move (see next_state_of)
+            tier: tier of the deck which reveals a card (0, 1, 2)
+            by_color: False to enumerate every distinct card, True to group cards
+                      by bonus color and sample one card per group (sparse sampling)
+
+        Returns:
+            columns, card_indexes: arrays describing each outcome, to be passed to apply_chance_outcome().
+                                   Columns are deck columns, not bonus colors (see card_db in logic.py)
+            probs: probability of each outcome, summing to 1 (empty arrays if deck is empty)
+        """
+        self.board.copy_state(board, True)
+        return self.board.chance_outcomes(tier, by_color)
+
+    def apply_chance_outcome(self, board, player: int, action: int, column: int, card_index: int):
+        """
+        Input:
+            board: board after a deterministic move (see next_state_of)
+            player: player who did the move
+            action: move which was played
+            column, card_index: outcome as returned by chance_outcomes()
+
+        Returns:
+            nextBoard: board where the revealed card has been drawn from the deck
+        """
+        tier, index = self.chance_event_of(action)
+        self.board.copy_state(board, True)
+        if index < 0:
+            self.board.reveal_reserved_card(player, tier, column, card_index)
+        else:
+            self.board.reveal_card(tier, index, column, card_index)
+        return self.board.get_state()
+
+    def observe(self, board):
+        """
+        Input:
+            board: current board
+
+        Returns:
+            0-d structured array (see observation_dtype in logic.py) with bank, visible cards,
+            reserved cards, nobles, and gems, bonus and points of each player. Cards have fields
+            'id', 'cost' and 'earning' like the dictionaries of get_cards_with_tier(). The array
+            is reused: it is only valid until next call.
+        """
+        return fill_observation(board, self.num_players, self._observation)
+
     def get_player_gems(self, board, player: int) -> List[int]:
         """
         Input:
@@ -86,6 +178,18 @@ class SplendorGame:
 
         return nobles_count
 
+    def get_noble_deficits(self, board, player: int) -> List[int]:
+        """
+        Input:
+            board: current board
+            player: player for query (0, 1, 2, 3)
+        Returns:
+            For each noble, number of bonus (cards) the given player still misses to get it,
+            or -1 if the noble already visited someone.
+        """
+        self.board.copy_state(board, False)
+        return [self.board.noble_deficit(player, noble) for noble in range(self.board.num_nobles)]
+
     def get_player_cards(self, board, player: int) -> List[int]:
         """
         Input:
@@ -206,6 +310,16 @@ class SplendorGame:
         self.board.copy_state(board, False)
         return self.board.check_end_game()
 
+    def games_ended(self, boards):
+        """
+        Input:
+            boards: array of boards, shape (N, rows, 7)
+
+        Returns:
+            array of shape (N, num_players), each line being what game_ended() returns for that board
+        """
+        return batch_check_end_game(boards, self.num_players, self.board.score_win, self.board.max_moves)
+
     def player_score(self, board, player: int) -> float:
         """
         Input:
@@ -233,7 +347,18 @@ class SplendorGame:
         """
         Returns: number of all possible actions
         """
-        return action_size()
+        return self.board.nb_actions
+
+    def engine_counters(self) -> dict:
+        """
+        Returns: number of calls of each rule check and action handler of the engine
+                 since last reset. Counters are only updated when engine is compiled
+                 with profiling (environment variable SPLENDOR_PROFILE=1).
+        """
+        return dict(zip(counter_names, self.board.counters.tolist()))
+
+    def reset_engine_counters(self):
+        self.board.counters[:] = 0
 
     def string_representation(self, board) -> str:
         """
@@ -263,6 +388,7 @@ class SplendorGame:
 
         Print: a human representation of such board on stdout, used during pit involving a human
         """
-        board = Board(self.num_players)
-        board.copy_state(numpy_board, False)
-        print_board(board, players)
+        if self._display_board is None:
+            self._display_board = Board(self.num_players)
+        self._display_board.copy_state(numpy_board, False)
+        self.renderer.print(self._display_board, players)
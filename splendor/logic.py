@@ -1,11 +1,20 @@
 import itertools
-import os
+import sys
 
 import numpy as np
 from colorama import Style, Fore, Back
 
 
 def move_to_str(move, short=False):
+    return short_move_strings[move] if short else move_strings[move]
+
+
+def row_to_str(row, n=2):
+    labels = row_labels[n]
+    return labels[row] if 0 <= row < len(labels) else f'unknown row {row}'
+
+
+def _format_move(move, short=False):
     color_names = ['white', 'blue', 'green', 'red', 'black', 'gold']
     if move < 12:
         tier, index = divmod(move, 4)
@@ -36,32 +45,40 @@ def move_to_str(move, short=False):
                 return f'{light_colors[i - len(list_different_gems_up_to_3)] + "    " + Style.RESET_ALL}'
             else:
                 return f'take 2 gems of color {color_names[i - len(list_different_gems_up_to_3)]}'
-    else:
+    elif move == 60:
         return f'nothing' if short else f'do nothing'
+    else:
+        i = move - 61
+        take, given = _format_move(30 + np_exchange_take_index[i], short), np_exchange_give[i]
+        if short:
+            return take + ' -' + ''.join(light_colors[c] + "  " + Style.RESET_ALL for c in range(6)
+                                           for _ in range(given[c]))
+        gems_str = [str(v) + " " + color_names[c] for c, v in enumerate(given) if v != 0]
+        return f'{take}, give back {", ".join(gems_str)}'
 
 
-def row_to_str(row, n=2):
+def _format_row(row, n=2):
+    # See layout in logic_numba.py
     if row < 1:
         return 'bank'
     if row < 25:
-        tier, index = divmod(row - 1, 4)
-        cost_or_value = ((row - 1) % 2 == 0)
-        return f'Card in tier {tier} index {index // 2} ' + ('cost' if cost_or_value else 'value')
-    if row < 28:
-        return f'Nb cards in deck of tier {row - 25}'
-    if row < 29 + n:
-        return f'Nobles num {row - 28}'
-    if row < 29 + 2 * n:
-        return f'Nb of gems of player {row - 29 - n}/{n}'
-    if row < 29 + 5 * n:
-        player, index = divmod(row - 29 - 2 * n, 3)
+        tier, index = divmod(row - 1, 8)
+        return f'Card in tier {tier} index {index // 2} ' + ('cost' if index % 2 == 0 else 'value')
+    if row < 31:
+        tier, index = divmod(row - 25, 2)
+        return f'Nb cards in deck of tier {tier}' if index == 0 else f'Cards in deck of tier {tier} (bitfield)'
+    if row < 32 + n:
+        return f'Noble {row - 31}'
+    if row < 32 + 2 * n:
+        return f'Gems of player {row - 32 - n}/{n}'
+    if row < 32 + 3 * n + n * n:
+        player, index = divmod(row - 32 - 2 * n, n + 1)
         return f'Noble {index} earned by player {player}/{n}'
-    if row < 29 + 6 * n:
-        return f'Cards of player {row - 29 - 5 * n}/{n}'
-    if row < 29 + 12 * n:
-        player, index = divmod(row - 29 - 6 * n, 6)
-        cost_or_value = (index % 2 == 0)
-        return f'Reserve {index // 2} of player {player}/{n} ' + ('cost' if cost_or_value else 'value')
+    if row < 32 + 4 * n + n * n:
+        return f'Cards of player {row - 32 - 3 * n - n * n}/{n}'
+    if row < 32 + 10 * n + n * n:
+        player, index = divmod(row - 32 - 4 * n - n * n, 6)
+        return f'Reserve {index // 2} of player {player}/{n} ' + ('cost' if index % 2 == 0 else 'value')
     return f'unknown row {row}'
 
 
@@ -78,6 +95,27 @@ list_different_gems_up_to_2 = _gen_list_of_different_gems(2)
 np_different_gems_up_to_2 = np.array(list_different_gems_up_to_2, dtype=np.int8)
 np_different_gems_up_to_3 = np.array(list_different_gems_up_to_3, dtype=np.int8)
 
+
+def _gen_exchanges():
+    # Optional actions taking gems then giving back as many as needed to keep 10 gems.
+    # Given gems are never of a taken color (it would be the same as taking less).
+    takes = list_different_gems_up_to_3 + [2 * np.array([int(i == c) for i in range(7)], dtype=np.int8)
+                                           for c in range(5)]
+    take_indexes, gives = [], []
+    for take_index, take in enumerate(takes):
+        others = [c for c in range(6) if take[c] == 0]
+        for nb_given in range(1, take.sum() + 1):
+            for combination in itertools.combinations_with_replacement(others, nb_given):
+                take_indexes.append(take_index)
+                gives.append(np.bincount(combination, minlength=7))
+    return np.array(take_indexes, dtype=np.int8), np.array(takes, dtype=np.int8)[take_indexes], \
+        np.array(gives, dtype=np.int8)
+
+
+# For each exchange action (61 and above): index of gems taken (as in actions 30-59), gems taken, gems given back
+np_exchange_take_index, np_exchange_take, np_exchange_give = _gen_exchanges()
+nb_exchanges = len(np_exchange_take_index)
+
 # cards_symmetries = itertools.permutations(range(4))
 cards_symmetries = [(1, 3, 0, 2), (2, 0, 3, 1), (3, 2, 1, 0)]
 reserve_symmetries = [
@@ -115,6 +153,151 @@ light_colors_if_zero = [
     Fore.LIGHTYELLOW_EX + Style.BRIGHT,  # gold
 ]
 
+# Lookup tables, so that formatting and decoding never recompute anything
+# Moves 61 and above are exchanges, only valid in games enabling them
+move_strings = [_format_move(move) for move in range(61 + nb_exchanges)]
+short_move_strings = [_format_move(move, short=True) for move in range(61 + nb_exchanges)]
+row_labels = {n: [_format_row(row, n) for row in range(32 + 10 * n + n * n)] for n in range(2, 5)}
+np_move_strings = np.array(move_strings)
+
+move_kinds = ('buy', 'reserve', 'reserve_deck', 'buy_reserve', 'take_different', 'take_identical', 'pass',
+              'exchange')
+move_dtype = np.dtype([
+    ('action', np.uint16),
+    ('kind', np.uint8),  # index in move_kinds
+    ('tier', np.int8),  # -1 if not applicable
+    ('index', np.int8),  # card index in tier or in reserve, -1 if not applicable
+    ('gems', np.int8, (5,)),  # gems taken from bank
+    ('given', np.int8, (6,)),  # gems given back to bank, including gold
+])
+
+
+def _gen_move_records():
+    records = np.zeros(61 + nb_exchanges, dtype=move_dtype)
+    records['tier'], records['index'] = -1, -1
+    for move in range(61 + nb_exchanges):
+        record = records[move]
+        record['action'] = move
+        if move < 12:
+            record['kind'] = 0
+            record['tier'], record['index'] = divmod(move, 4)
+        elif move < 24:
+            record['kind'] = 1
+            record['tier'], record['index'] = divmod(move - 12, 4)
+        elif move < 27:
+            record['kind'], record['tier'] = 2, move - 24
+        elif move < 30:
+            record['kind'], record['index'] = 3, move - 27
+        elif move < 30 + len(list_different_gems_up_to_3):
+            record['kind'], record['gems'] = 4, list_different_gems_up_to_3[move - 30][:5]
+        elif move < 60:
+            record['kind'] = 5
+            record['gems'][move - 30 - len(list_different_gems_up_to_3)] = 2
+        elif move == 60:
+            record['kind'] = 6
+        else:
+            record['kind'] = 7
+            record['gems'], record['given'] = np_exchange_take[move - 61][:5], np_exchange_give[move - 61][:6]
+    return records
+
+
+move_records = _gen_move_records()
+
+
+def decode_moves(actions):
+    """
+    Input:
+        actions: sequence of actions (any shape)
+
+    Returns:
+        recarray of same shape with fields of move_dtype (see move_strings[action] for a description)
+    """
+    return move_records[np.asarray(actions, dtype=np.intp)].view(np.recarray)
+
+
+def state_dtype(n):
+    return np.dtype([
+        ('turn', np.uint8),  # number of moves played so far (see Board.get_round)
+        ('bank', np.int8, (6,)),
+        ('deck', np.int8, (3,)),  # number of cards left in each deck
+        ('gems', np.int8, (n, 6)),
+        ('cards', np.int8, (n, 5)),
+        ('points', np.int8, (n,)),  # cards and nobles
+        ('nobles', np.int8, (n,)),  # number of nobles earned
+        ('reserved', np.int8, (n,)),  # number of reserved cards
+    ])
+
+
+def decode_states(states, n):
+    """
+    Input:
+        states: array of boards of shape (..., 32+10n+n*n, 7)
+        n: number of players
+
+    Returns:
+        recarray of shape states.shape[:-2] with fields of state_dtype(n)
+    """
+    states = np.asarray(states)
+    batch = states.shape[:-2]
+    nobles = states[..., 32 + 2 * n:32 + 3 * n + n * n, :].reshape(batch + (n, n + 1, 7))
+    cards = states[..., 32 + 3 * n + n * n:32 + 4 * n + n * n, :]
+    reserved = states[..., 32 + 4 * n + n * n:32 + 10 * n + n * n, :].reshape(batch + (n, 3, 2, 7))
+
+    records = np.zeros(batch, dtype=state_dtype(n)).view(np.recarray)
+    records.turn = states[..., 0, idx_points].astype(np.uint8)
+    records.bank = states[..., 0, :6]
+    records.deck = states[..., 25:31:2, :5].sum(axis=-1)
+    records.gems = states[..., 32 + n:32 + 2 * n, :6]
+    records.cards = cards[..., :5]
+    records.points = cards[..., idx_points] + nobles[..., idx_points].sum(axis=-1)
+    records.nobles = (nobles[..., idx_points] > 0).sum(axis=-1)
+    records.reserved = (reserved[..., 0, :5] != 0).any(axis=-1).sum(axis=-1)
+    return records
+
+
+card_view_dtype = np.dtype([
+    ('id', np.uint8),  # see card_db, no_card for an empty slot
+    ('cost', np.int8, (5,)),  # White(Diamond), Blue(Sapphire), Green(Emerald), Red(Ruby), Black(Onyx)
+    ('earning', np.int8, (7,)),  # same colors, then Dummy and Card Points
+])
+
+
+def observation_dtype(n):
+    return np.dtype([
+        ('turn', np.uint8),
+        ('bank', np.int8, (6,)),  # same colors, then Jocker(Gold)
+        ('cards', card_view_dtype, (12,)),  # visible cards, 4 per tier from tier 0
+        ('reserved', card_view_dtype, (n, 3)),
+        ('nobles', np.int8, (n + 1, 5)),  # requirements of nobles still available, zeros otherwise
+        ('gems', np.int8, (n, 6)),
+        ('bonus', np.int8, (n, 5)),  # cards owned of each color
+        ('points', np.int8, (n,)),
+    ])
+
+
+def _fill_cards(rows, out):
+    cards = rows.reshape(-1, 2, 7)
+    out['id'] = card_ids_of(cards).reshape(out.shape)
+    out['cost'] = cards[:, 0, :5].reshape(out.shape + (5,))
+    out['earning'] = cards[:, 1, :].reshape(out.shape + (7,))
+
+
+def fill_observation(state, n, out):
+    """
+    Fill out, a 0-d array of observation_dtype(n), from state (a board of n players)
+    """
+    out['turn'] = state[0, idx_points]
+    out['bank'] = state[0, :6]
+    _fill_cards(state[1:25], out['cards'])
+    _fill_cards(state[32 + 4 * n + n * n:32 + 10 * n + n * n], out['reserved'])
+    out['nobles'] = state[31:32 + n, :5]
+    out['gems'] = state[32 + n:32 + 2 * n, :6]
+    cards = state[32 + 3 * n + n * n:32 + 4 * n + n * n]
+    out['bonus'] = cards[:, :5]
+    nobles = state[32 + 2 * n:32 + 3 * n + n * n, idx_points].reshape(n, n + 1)
+    out['points'] = cards[:, idx_points] + nobles.sum(axis=1)
+    return out
+
 
 #    W Blu G  R  Blk  Point
 all_nobles = [
@@ -272,159 +455,266 @@ np_all_cards_2 = np.array(all_cards_2, dtype=np.int8)
 np_all_cards_3 = np.array(all_cards_3, dtype=np.int8)
 len_all_cards = np.array([len(all_cards_1[0]), len(all_cards_2[0]), len(all_cards_3[0])], dtype=np.int8)
 
-
-def _print_round_and_scores(board, players):
+# Card database: every card gets a stable ID (tier by tier, in the order of the
+# lists above). Engine identifies a deck card by its column in the deck rows of
+# the board (index of its list above, which is not its bonus color) and its bit
+# in the bitfield of that column.
+no_card = 255
+card_dtype = np.dtype([
+    ('id', np.uint8),
+    ('tier', np.uint8),
+    ('column', np.uint8),  # column in nb_deck_tiers rows
+    ('bit', np.uint8),  # position in bitfield of the column
+    ('color', np.uint8),  # bonus color
+    ('points', np.uint8),
+    ('cost', np.uint8, (5,)),
+    ('rows', np.int8, (2, 7)),  # representation on board
+])
+
+
+def _gen_card_database():
+    records = []
+    for tier, cards in enumerate((np_all_cards_1, np_all_cards_2, np_all_cards_3)):
+        for column in range(cards.shape[0]):
+            for bit in range(cards.shape[1]):
+                card = cards[column, bit]
+                records.append((len(records), tier, column, bit, np.flatnonzero(card[1, :5])[0], card[1, idx_points],
+                                card[0, :5], card))
+    return np.array(records, dtype=card_dtype).view(np.recarray)
+
+
+card_db = _gen_card_database()
+nb_cards = len(card_db)
+# (tier, column, bit) -> card ID, no_card if out of deck
+deck_card_ids = np.full((3, 5, len_all_cards.max()), no_card, dtype=np.uint8)
+deck_card_ids[card_db.tier, card_db.column, card_db.bit] = card_db.id
+# Colors needed to buy each card, in color order
+card_cost_colors = [np.flatnonzero(cost).tolist() for cost in card_db.cost]
+# Nobles each bonus color contributes to, and nobles each card contributes to
+nobles_of_color = (np_all_nobles[:, :5] > 0).T
+card_nobles = nobles_of_color[card_db.color]
+
+_key_powers = 8 ** np.arange(5)
+
+
+def _card_keys(cost, color):
+    # Costs are below 8, and cost with color identify a card
+    return (cost.astype(np.int32) * _key_powers).sum(axis=-1) * 5 + color
+
+
+card_id_lookup = np.full(8 ** 5 * 5, no_card, dtype=np.uint8)
+card_id_lookup[_card_keys(card_db.cost, card_db.color)] = card_db.id
+assert (np.bincount(_card_keys(card_db.cost, card_db.color)) <= 1).all(), 'Card keys should be unique'
+
+
+def card_ids_of(cards):
+    """
+    Input:
+        cards: card rows as stored in board, of shape (..., 2, 7)
+
+    Returns:
+        card IDs of shape (...), no_card for empty slots
+    """
+    cards = np.asarray(cards)
+    color = cards[..., 1, :5].argmax(axis=-1)
+    return card_id_lookup[_card_keys(cards[..., 0, :5], color)]
+
+
+def _render_round_and_scores(board, players, out):
     n = board.num_players
     rnd, turn = divmod(board.get_round(), n)
-    print()
-    print('=' * 10, f' round {rnd} turn {turn}  ', end='')
+    out.append('\n' + '=' * 10 + f'  round {rnd} turn {turn}  ')
 
     scores = {p: board.get_score(p) for p in range(n)}
     max_score = max(scores.values())
     for p in range(n):
         if p == turn:
-            print(f'{Back.LIGHTBLACK_EX + Fore.LIGHTYELLOW_EX}{players[p][:8]:8s}: {scores[p]} points{Style.RESET_ALL}  ', end='')
+            out.append(f'{Back.LIGHTBLACK_EX + Fore.LIGHTYELLOW_EX}{players[p][:8]:8s}: {scores[p]} points{Style.RESET_ALL}  ')
         elif 0 < scores[p] == max_score:
-            print(f'{Fore.CYAN + Style.BRIGHT}{players[p][:8]:8s}: {scores[p]} points{Style.RESET_ALL}  ', end='')
+            out.append(f'{Fore.CYAN + Style.BRIGHT}{players[p][:8]:8s}: {scores[p]} points{Style.RESET_ALL}  ')
         else:
-            print(f'{Style.BRIGHT}{players[p][:8]:8s}{Style.RESET_ALL}: {scores[p]} points  ', end='')
+            out.append(f'{Style.BRIGHT}{players[p][:8]:8s}{Style.RESET_ALL}: {scores[p]} points  ')
 
-    print('=' * 10, Style.RESET_ALL)
-    print()
-    print()
+    out.append('=' * 10 + ' ' + Style.RESET_ALL + '\n\n\n')
 
 
-def _print_nobles(board):
-    print(f'{Style.BRIGHT}Nobles:  {Style.RESET_ALL}', end='')
+def _render_nobles(board, out):
+    out.append(f'{Style.BRIGHT}Nobles:  {Style.RESET_ALL}')
     for noble in board.nobles:
         if noble[idx_points] == 0:
-            print(f'< {Style.DIM}empty{Style.RESET_ALL} >', end=' ')
+            out.append(f'< {Style.DIM}empty{Style.RESET_ALL} > ')
         else:
-            print(f'< {noble[idx_points]} points ', end='')
+            out.append(f'< {noble[idx_points]} points ')
             for i, color in enumerate(light_colors):
                 if noble[i] != 0:
-                    print(f'{color} {noble[i]} {Style.RESET_ALL} ', end='')
-            print(f'> ', end='')
-    print(f'{Style.RESET_ALL}')
+                    out.append(f'{color} {noble[i]} {Style.RESET_ALL} ')
+            out.append(f'> ')
+    out.append(f'{Style.RESET_ALL}\n')
 
 
-def _print_card_line(card, line, space_between):
-    if card[1, :5].sum() == 0:
-        print(f' ' * (8 + space_between), end='')
+def _render_card_line(card, line, space_between, out):
+    card_id = card_ids_of(card)
+    if card_id == no_card:
+        out.append(' ' * (8 + space_between))
         return
-    card_color = np.flatnonzero(card[1, :5] != 0)[0]
-    background = light_colors[card_color]
-    print(background, end='')
+    background = light_colors[card_db.color[card_id]]
+    out.append(background)
     if line == 0:
-        print(f'     {Style.BRIGHT}{card[1][idx_points]}{Style.NORMAL}  ', end='')
+        out.append(f'     {Style.BRIGHT}{card_db.points[card_id]}{Style.NORMAL}  ')
     else:
-        card_cost = np.flatnonzero(card[0, :5] != 0)
-        if line - 1 < card_cost.size:
+        card_cost = card_cost_colors[card_id]
+        if line - 1 < len(card_cost):
             color = card_cost[line - 1]
-            value = card[0, color]
-            print(f' {light_colors[color]} {value} {background}    ', end='')
+            value = card_db.cost[card_id, color]
+            out.append(f' {light_colors[color]} {value} {background}    ')
         else:
-            print(' ' * 8, end='')
-    print(Style.RESET_ALL, end=' ' * space_between)
+            out.append(' ' * 8)
+    out.append(Style.RESET_ALL + ' ' * space_between)
 
 
-def _print_tiers(board):
+def _render_tiers(board, out):
     for tier in range(2, -1, -1):
         for line in range(6):
             if line == 3:
-                print(f'Tier {tier}:  ', end='')
+                out.append(f'Tier {tier}:  ')
             elif line == 4:
-                print(f'  ({board.nb_deck_tiers[2 * tier].sum():>2})   ', end='')
+                out.append(f'  ({board.nb_deck_tiers[2 * tier].sum():>2})   ')
             else:
-                print(f'         ', end='')
+                out.append(' ' * 9)
             if line < 5:
                 for i in range(4):
-                    _print_card_line(board.cards_tiers[8 * tier + 2 * i:8 * tier + 2 * i + 2, :], line, 4)
+                    _render_card_line(board.cards_tiers[8 * tier + 2 * i:8 * tier + 2 * i + 2, :], line, 4, out)
             else:
                 for i in range(4):
-                    print(f'   Act{tier * 4 + i:2d}', end='    ')
-            print()
-        print()
+                    out.append(f'   Act{tier * 4 + i:2d}    ')
+            out.append('\n')
+        out.append('\n')
 
 
-def _print_bank(board):
-    print(f'{Style.BRIGHT}Bank: {Style.RESET_ALL}   ', end='')
+def _render_bank(board, out):
+    out.append(f'{Style.BRIGHT}Bank: {Style.RESET_ALL}   ')
     for c in range(6):
-        print(f'{light_colors[c] if board.bank[0][c] else light_colors_if_zero[c]} '
-              f'{board.bank[0][c]} {Style.RESET_ALL} ', end='')
-    print(f'{Style.RESET_ALL}')
+        out.append(f'{light_colors[c] if board.bank[0][c] else light_colors_if_zero[c]} '
+                   f'{board.bank[0][c]} {Style.RESET_ALL} ')
+    out.append(f'{Style.RESET_ALL}\n')
 
 
-def _print_players(board, players):
+def _render_players(board, players, out):
     n = board.num_players
     turn = board.get_round() % n
     # NAMES
-    print(' ' * 7, end='')
+    out.append(' ' * 7)
     for p in range(n):
         if turn == p:
-            print(f'{Back.LIGHTBLACK_EX + Fore.YELLOW + Style.BRIGHT}', end='')
-        print(f' ' * 12, end='')
-        print(f'{players[p][:8]:8s}', end='')
-        print(f' ' * 14, end='')
+            out.append(f'{Back.LIGHTBLACK_EX + Fore.YELLOW + Style.BRIGHT}')
+        out.append(' ' * 12 + f'{players[p][:8]:8s}' + ' ' * 14)
         if turn == p:
-            print(f'{Style.RESET_ALL}', end='')
-    print()
+            out.append(f'{Style.RESET_ALL}')
+    out.append('\n')
 
     # NOBLES
-    print(' ' * 9, end='')
+    out.append(' ' * 9)
     for p in range(n):
-        for noble in board.players_nobles[3 * p:3 * p + 3]:
-            if noble[idx_points] > 0:
-                print(f'  < {Style.BRIGHT}{noble[idx_points]}{Style.RESET_ALL} >  ', end='')
-            else:
-                print(f'        ', end='')
-        print(f' ' * 10, end='')
-    print()
+        # Earned nobles first, in 3 columns at least to stay aligned with names
+        nobles = board.players_nobles[board.num_nobles * p:board.num_nobles * (p + 1), idx_points]
+        earned = nobles[nobles > 0]
+        for points in earned:
+            out.append(f'  < {Style.BRIGHT}{points}{Style.RESET_ALL} >  ')
+        out.append(' ' * 8 * max(3 - len(earned), 0))
+        out.append(' ' * 10)
+    out.append('\n')
 
     # GEMS
-    print(f'{Style.BRIGHT}Gems: {Style.RESET_ALL}   ', end='')
+    out.append(f'{Style.BRIGHT}Gems: {Style.RESET_ALL}   ')
     for p in range(n):
         for c in range(6):
             my_gems = board.players_gems[p][c]
-            print(f'{light_colors[c] if my_gems else light_colors_if_zero[c]} {my_gems} {Style.RESET_ALL} ', end='')
-        print(f'= Sum{board.players_gems[p].sum():2}   ', end='')
-    print()
+            out.append(f'{light_colors[c] if my_gems else light_colors_if_zero[c]} {my_gems} {Style.RESET_ALL} ')
+        out.append(f'= Sum{board.players_gems[p].sum():2}   ')
+    out.append('\n')
 
     # CARDS
-    # print()
-    print(f'{Style.BRIGHT}Cards: {Style.RESET_ALL}  ', end='')
+    out.append(f'{Style.BRIGHT}Cards: {Style.RESET_ALL}  ')
     for p in range(n):
         for c in range(5):
             my_cards = board.players_cards[p][c]
-            print(f'{light_colors[c] if my_cards else light_colors_if_zero[c]} {my_cards} {Style.RESET_ALL} ', end='')
-        print(f'              ', end='')
-    print()
+            out.append(f'{light_colors[c] if my_cards else light_colors_if_zero[c]} {my_cards} {Style.RESET_ALL} ')
+        out.append(' ' * 14)
+    out.append('\n')
 
     # RESERVED
     if board.players_reserved.sum() > 0:
-        print()
+        out.append('\n')
         for line in range(5):
             if line == 2:
-                print(f'{Style.BRIGHT}Reserve: {Style.RESET_ALL}', end='')
+                out.append(f'{Style.BRIGHT}Reserve: {Style.RESET_ALL}')
             else:
-                print(' ' * 9, end='')
+                out.append(' ' * 9)
             for p in range(n):
                 for r in range(3):
                     reserved = board.players_reserved[6 * p + 2 * r:6 * p + 2 * r + 2]
                     if reserved[0].sum() != 0:
-                        _print_card_line(reserved, line, 2)
+                        _render_card_line(reserved, line, 2, out)
                     else:
-                        print(f' ' * 10, end='')
-                print(f' ' * 4, end='')
-            print()
+                        out.append(' ' * 10)
+                out.append(' ' * 4)
+            out.append('\n')
+
+
+def render_board(board, players) -> str:
+    """
+    Returns: a human representation of board (a Board instance), as one printable string
+    """
+    out = []
+    _render_round_and_scores(board, players, out)
+    _render_nobles(board, out)
+    out.append('\n')
+    _render_tiers(board, out)
+    _render_bank(board, out)
+    out.append('\n')
+    _render_players(board, players, out)
+    return ''.join(out)
 
 
 def print_board(board, players):
-    #os.system('clear')
-    _print_round_and_scores(board, players)
-    _print_nobles(board)
-    print()
-    _print_tiers(board)
-    _print_bank(board)
-    print()
-    _print_players(board, players)
+    sys.stdout.write(render_board(board, players))
+
+
+class BoardRenderer:
+    """
+    Print boards in one write per frame. With diff=True, the screen is cleared
+    at the first frame, then only the lines which changed since the previous
+    frame are rewritten (using ANSI cursor moves), and whatever was printed
+    below the previous frame is erased. Frames must fit in the terminal height.
+    """
+
+    def __init__(self, diff=False, stream=None):
+        self.diff = diff
+        self.stream = stream
+        self.previous = None
+
+    def reset(self):
+        self.previous = None
+
+    def frame(self, board, players) -> str:
+        """
+        Returns: string to write to update the terminal from previous frame to board
+        """
+        text = render_board(board, players)
+        if not self.diff:
+            return text
+        lines = text.split('\n')
+        if self.previous is None:
+            update = '\x1b[H\x1b[2J' + text
+        else:
+            changed = [f'\x1b[{row + 1};1H\x1b[2K{line}' for row, line in enumerate(lines)
+                       if row >= len(self.previous) or self.previous[row] != line]
+            # Frames end with a newline: cursor goes to the start of the last (empty) line
+            update = ''.join(changed) + f'\x1b[{len(lines)};1H\x1b[J'
+        self.previous = lines
+        return update
+
+    def print(self, board, players):
+        stream = self.stream or sys.stdout
+        stream.write(self.frame(board, players))
+        stream.flush()
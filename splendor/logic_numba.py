@@ -1,13 +1,29 @@
+import os
+
 import numba
 import numpy as np
 from numba import njit
 
 from .logic import np_all_nobles, np_all_cards_1, np_all_cards_2, np_all_cards_3, len_all_cards, \
-    np_different_gems_up_to_2, np_different_gems_up_to_3, np_cards_symmetries, np_reserve_symmetries
+    np_different_gems_up_to_2, np_different_gems_up_to_3, np_cards_symmetries, np_reserve_symmetries, \
+    np_exchange_take_index, np_exchange_take, np_exchange_give, nb_exchanges
 
 idx_white, idx_blue, idx_green, idx_red, idx_black, idx_gold, idx_points = range(7)
 mask = np.array([128, 64, 32, 16, 8, 4, 2, 1], dtype=np.uint8)
 
+# Profiling counters are compiled into Board only if SPLENDOR_PROFILE=1 is set
+# before Board is compiled (i.e. first instantiated); numba freezes globals as
+# constants, so when disabled the counting code is removed at compile time.
+PROFILE = os.environ.get('SPLENDOR_PROFILE', '0') == '1'
+counter_names = ['valid_buy', 'valid_reserve', 'valid_buy_reserve', 'valid_get_gems', 'valid_get_gems_identical',
+                 'valid_give_gems', 'valid_give_gems_identical', 'buy', 'reserve', 'buy_reserve', 'get_gems',
+                 'give_gems', 'deck_draw', 'nobles_check', 'copy_state', 'valid_exchange', 'exchange']
+cnt_valid_buy, cnt_valid_reserve, cnt_valid_buy_reserve, cnt_valid_get_gems, cnt_valid_get_gems_identical, \
+    cnt_valid_give_gems, cnt_valid_give_gems_identical, cnt_buy, cnt_reserve, cnt_buy_reserve, cnt_get_gems, \
+    cnt_give_gems, cnt_deck_draw, cnt_nobles_check, cnt_copy_state, cnt_valid_exchange, cnt_exchange \
+    = range(len(counter_names))
+nb_counters = len(counter_names)
+
 
 ############################## BOARD DESCRIPTION ##############################
 # Board is described by a 56x7 array (1st dim is larger with 3-4 players)
@@ -84,6 +100,10 @@ mask = np.array([128, 64, 32, 16, 8, 4, 2, 1], dtype=np.uint8)
 #####   60   No action, pass
 # List of combinations of gems for actions 30-79 are in variables
 # list_different_gems_up_to_2 and list_different_gems_up_to_3 in file SplendorLogic
+#
+# Optionally (see enable_exchanges), 455 more actions follow, taking gems like
+# actions 30-59 and giving back some others so that player ends with 10 gems,
+# as in real rules. They are described in np_exchange_* variables in logic.py.
 
 
 @njit(cache=True, fastmath=True, nogil=True)
@@ -121,6 +141,60 @@ def np_all_axis1(x):
     return out
 
 
+@njit(cache=True, fastmath=True, nogil=True)
+def end_game_utilities(state, num_players, score_win, max_moves):
+    # Utility of each player if game is over (see Board.check_end_game), zeros otherwise.
+    # Game is over once a player has score_win points, or after max_moves moves.
+    n = num_players
+    result = np.zeros(n, dtype=np.float32)
+    nb_moves = state[0, idx_points] & 0xFF  # stored as uint8
+    if nb_moves % n != 0:  # Check only when 1st player is about to play
+        return result
+
+    num_nobles = n + 1
+    nobles_start, cards_start = 32 + 2 * n, 32 + 3 * n + n * n
+    scores = np.zeros(n, dtype=np.float32)
+    for p in range(n):
+        score = np.int32(state[cards_start + p, idx_points])
+        for noble in range(num_nobles):
+            score += state[nobles_start + num_nobles * p + noble, idx_points]
+        scores[p] = score
+    score_max = scores.max()
+    if score_max < score_win and nb_moves < max_moves:
+        return result
+
+    nb_winners = (scores == score_max).sum()
+    # Resolve tie by applying penalty in function of nb of cards
+    if nb_winners > 1:
+        for p in range(n):
+            scores[p] -= np.int32(state[cards_start + p, :idx_gold].sum()) / 100.
+        score_max = scores.max()
+        nb_winners = (scores == score_max).sum()
+
+    for p in range(n):
+        if scores[p] == score_max:
+            result[p] = 0.01 if nb_winners > 1 else 1.
+        else:
+            result[p] = -1.
+    return result
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def batch_check_end_game(states, num_players, score_win, max_moves):
+    """
+    Input:
+        states: boards of shape (N, 32+10n+n*n, 7)
+        score_win, max_moves: end conditions, as in Board
+
+    Returns:
+        utilities of shape (N, n), all zeros for boards where game is not over
+    """
+    result = np.zeros((states.shape[0], num_players), dtype=np.float32)
+    for i in range(states.shape[0]):
+        result[i] = end_game_utilities(states[i], num_players, score_win, max_moves)
+    return result
+
+
 spec = [
     ('num_players', numba.int8),
     ('current_player_index', numba.int8),
@@ -138,6 +212,13 @@ spec = [
     ('players_nobles', numba.int8[:, :]),
     ('players_cards', numba.int8[:, :]),
     ('players_reserved', numba.int8[:, :]),
+
+    ('deck_priority', numba.int8[:, :]),
+    ('counters', numba.int64[:]),
+    ('noble_deficits', numba.int8[:, :]),
+    ('deficits_dirty', numba.boolean),
+    ('deficits_source', numba.int8[:, :]),
+    ('nb_actions', numba.int64),
 ]
 
 
@@ -151,12 +232,23 @@ class Board:
         self.num_nobles = {2: 3, 3: 4, 4: 5}[n]
         self.max_moves = 62 * num_players
         self.score_win = 15
+        self.nb_actions = action_size()
         self.state = np.zeros(observation_size(self.num_players), dtype=np.int8)
+        # Order in which deck cards are drawn, -1 to draw randomly (see set_determinization)
+        self.deck_priority = np.full((3, 5 * len_all_cards.max()), -1, dtype=np.int8)
+        # Number of calls of each function listed in counter_names, only updated if PROFILE
+        self.counters = np.zeros(nb_counters, dtype=np.int64)
+        # Number of bonus each player misses to get each noble, -1 if noble is gone.
+        # Updated on card gain, recomputed on next use only if nobles or bonuses of
+        # a new state differ from deficits_source (nobles then bonuses the table is for).
+        self.noble_deficits = np.zeros((n, self.num_nobles), dtype=np.int8)
+        self.deficits_source = np.zeros((self.num_nobles + n, idx_gold), dtype=np.int8)
+        self.deficits_dirty = True
         self.init_game()
 
     def get_score(self, player):
         card_points = self.players_cards[player, idx_points]
-        noble_points = self.players_nobles[player * 3:player * 3 + 3, idx_points].sum()
+        noble_points = self.players_nobles[player * self.num_nobles:(player + 1) * self.num_nobles, idx_points].sum()
         return card_points + noble_points
 
     def init_game(self):
@@ -179,18 +271,25 @@ class Board:
         nobles_indexes = np.random.choice(len(np_all_nobles), size=self.num_nobles, replace=False)
         for i, index in enumerate(nobles_indexes):
             self.nobles[i, :] = np_all_nobles[index]
+        self.deficits_dirty = True
 
     def get_state(self):
         return self.state
 
+    def enable_exchanges(self):
+        # Add actions taking gems and giving back some in same move
+        self.nb_actions = action_size() + nb_exchanges
+
     def valid_moves(self, player):
-        result = np.zeros(action_size(), dtype=np.bool_)
+        result = np.zeros(self.nb_actions, dtype=np.bool_)
         result[0:12] = self._valid_buy(player)
         result[12:12 + 15] = self._valid_reserve(player)
         result[12 + 15:12 + 15 + 3] = self._valid_buy_reserve(player)
         result[12 + 15 + 3:12 + 15 + 3 + 30] = np.concatenate(
             (self._valid_get_gems(player), self._valid_get_gems_identical(player)))
         result[60] = True  # empty move
+        if self.nb_actions > action_size():
+            result[action_size():] = self._valid_exchanges(player)
         return result
 
     def make_move(self, move, player, deterministic):
@@ -202,8 +301,10 @@ class Board:
             self._buy_reserve(move - 12 - 15, player)
         elif move < 12 + 15 + 3 + 30:
             self._get_gems(move - 12 - 15 - 3, player)
-        else:
+        elif move == 60:
             pass  # empty move
+        else:
+            self._exchange_gems(move - action_size(), player)
 
         self.bank[0][idx_points] += 1  # Count number of rounds
 
@@ -211,7 +312,11 @@ class Board:
 
     def copy_state(self, state, copy_or_not):
         if self.state is state and not copy_or_not:
+            # Even when state is already used, it may have been modified from outside
+            self._check_deficits_source()
             return
+        if PROFILE:
+            self.counters[cnt_copy_state] += 1
         self.state = state.copy() if copy_or_not else state
         n = self.num_players
         self.bank = self.state[0:1, :]  # 1
@@ -222,27 +327,10 @@ class Board:
         self.players_nobles = self.state[32 + 2 * n:32 + 3 * n + n * n, :]  # N*(N+1)
         self.players_cards = self.state[32 + 3 * n + n * n:32 + 4 * n + n * n, :]  # N
         self.players_reserved = self.state[32 + 4 * n + n * n:32 + 10 * n + n * n, :]  # 6*N
+        self._check_deficits_source()
 
     def check_end_game(self):
-        if self.get_round() % self.num_players != 0:  # Check only when 1st player is about to play
-            return np.full(self.num_players, 0., dtype=np.float32)
-
-        scores = np.array([self.get_score(p) for p in range(self.num_players)], dtype=np.float32)
-        score_max = scores.max()
-        end = (score_max >= self.score_win) or (self.get_round() >= self.max_moves)
-        if not end:
-            return np.full(self.num_players, 0., dtype=np.float32)
-        who_has_won = (scores == score_max)
-        several_winners = (who_has_won.sum() > 1)
-        # Resolve tie by applying penalty in function of nb of cards
-        if several_winners:
-            for p in range(self.num_players):
-                scores[p] -= self._nb_of_cards(p) / 100.
-                score_max = scores.max()
-                who_has_won = (scores == score_max)
-                several_winners = (who_has_won.sum() > 1)
-
-        return np.where(who_has_won > 0, 0.01 if several_winners else 1., -1.).astype(np.float32)
+        return end_game_utilities(self.state, self.num_players, self.score_win, self.max_moves)
 
     # if n=1, transform P0 to Pn, P1 to P0, ... and Pn to Pn-1
     # else do this action n times
@@ -253,8 +341,9 @@ class Board:
             for i in range(size0):
                 array[i, :] = tmp_copy[(i + shift) % size0, :]
 
+        self.deficits_dirty = True
         _roll_in_place_axis0(self.players_gems, 1 * nb_swaps)
-        _roll_in_place_axis0(self.players_nobles, 3 * nb_swaps)
+        _roll_in_place_axis0(self.players_nobles, self.num_nobles * nb_swaps)
         _roll_in_place_axis0(self.players_cards, 1 * nb_swaps)
         _roll_in_place_axis0(self.players_reserved, 6 * nb_swaps)
 
@@ -315,28 +404,114 @@ class Board:
         self.bank[0] += self.players_gems[player]
         self.players_gems[player] -= self.players_gems[player]
 
-    def _get_deck_card(self, tier):
-        nb_remaining_cards_per_color = self.nb_deck_tiers[2 * tier, :idx_gold]
-        if nb_remaining_cards_per_color.sum() == 0:  # no more cards
-            return None
+    def sample_determinization(self):
+        # Random draw order of the cards remaining in each deck, as listed by bitfields
+        priority = np.full(self.deck_priority.shape, -1, dtype=np.int8)
+        for tier in range(3):
+            nb_cards_per_color = len_all_cards[tier]
+            remaining = np.zeros(5 * nb_cards_per_color, dtype=np.int8)
+            nb_remaining = 0
+            for color in range(5):
+                cards = my_unpackbits(self.nb_deck_tiers[2 * tier + 1, color])
+                for card_index in range(nb_cards_per_color):
+                    if cards[card_index]:
+                        remaining[nb_remaining] = color * nb_cards_per_color + card_index
+                        nb_remaining += 1
+            priority[tier, :nb_remaining] = np.random.permutation(remaining[:nb_remaining])
+        return priority
+
+    def set_determinization(self, priority):
+        # Once set, deck draws are no longer random but follow given priority;
+        # a priority full of -1 restores random draws
+        self.deck_priority[:] = priority
+
+    def _next_priority_card(self, tier):
+        nb_cards_per_color = len_all_cards[tier]
+        for card_id in self.deck_priority[tier]:
+            if card_id < 0:
+                break
+            color, card_index = divmod(card_id, nb_cards_per_color)
+            if my_unpackbits(self.nb_deck_tiers[2 * tier + 1, color])[card_index]:
+                return color, card_index
+        # Priority doesn't list remaining cards, fallback to a random draw
+        return self._random_deck_card(tier)
 
+    def _random_deck_card(self, tier):
+        nb_remaining_cards_per_color = self.nb_deck_tiers[2 * tier, :idx_gold]
         # First we chose color randomly, then we pick a card
         color = my_random_choice(nb_remaining_cards_per_color / nb_remaining_cards_per_color.sum())
         remaining_cards = my_unpackbits(self.nb_deck_tiers[2 * tier + 1, color])
         card_index = my_random_choice(remaining_cards / remaining_cards.sum())
+        return color, card_index
+
+    def _get_deck_card(self, tier):
+        nb_remaining_cards_per_color = self.nb_deck_tiers[2 * tier, :idx_gold]
+        if nb_remaining_cards_per_color.sum() == 0:  # no more cards
+            return None
+        if PROFILE:
+            self.counters[cnt_deck_draw] += 1
+
+        if self.deck_priority[tier, 0] >= 0:
+            color, card_index = self._next_priority_card(tier)
+        else:
+            color, card_index = self._random_deck_card(tier)
+        return self._take_deck_card(tier, color, card_index)
+
+    def _take_deck_card(self, tier, column, card_index):
         # Update internals
+        remaining_cards = my_unpackbits(self.nb_deck_tiers[2 * tier + 1, column])
         remaining_cards[card_index] = 0
-        self.nb_deck_tiers[2 * tier + 1, color] = my_packbits(remaining_cards)
-        self.nb_deck_tiers[2 * tier, color] -= 1
+        self.nb_deck_tiers[2 * tier + 1, column] = my_packbits(remaining_cards)
+        self.nb_deck_tiers[2 * tier, column] -= 1
 
         if tier == 0:
-            card = np_all_cards_1[color][card_index]
+            card = np_all_cards_1[column][card_index]
         elif tier == 1:
-            card = np_all_cards_2[color][card_index]
+            card = np_all_cards_2[column][card_index]
         else:
-            card = np_all_cards_3[color][card_index]
+            card = np_all_cards_3[column][card_index]
         return card
 
+    def chance_outcomes(self, tier, by_color):
+        # List cards that can be revealed from deck of given tier, with their probability.
+        # Each remaining card is equally likely. If by_color, outcomes are grouped by
+        # bonus color: one card of each color is sampled to represent its group.
+        # Outcomes give the deck column of cards, not their bonus color: each column
+        # holds the cards of one bonus color (see card_db.column and card_db.color in logic.py).
+        nb_cards_per_column = len_all_cards[tier]
+        nb_remaining_cards_per_column = self.nb_deck_tiers[2 * tier, :idx_gold]
+        total = nb_remaining_cards_per_column.sum()
+        size = (nb_remaining_cards_per_column > 0).sum() if by_color else total
+        columns = np.zeros(size, dtype=np.int8)
+        card_indexes = np.zeros(size, dtype=np.int8)
+        probs = np.zeros(size, dtype=np.float32)
+
+        i = 0
+        for column in range(5):
+            if nb_remaining_cards_per_column[column] == 0:
+                continue
+            remaining_cards = my_unpackbits(self.nb_deck_tiers[2 * tier + 1, column])[:nb_cards_per_column]
+            if by_color:
+                columns[i] = column
+                card_indexes[i] = my_random_choice(remaining_cards / remaining_cards.sum())
+                probs[i] = nb_remaining_cards_per_column[column] / total
+                i += 1
+            else:
+                for card_index in np.flatnonzero(remaining_cards):
+                    columns[i], card_indexes[i], probs[i] = column, card_index, 1. / total
+                    i += 1
+
+        return columns, card_indexes, probs
+
+    def reveal_card(self, tier, index, column, card_index):
+        # Resolve chance event left by a deterministic buy or reserve: move given deck card to visible slot
+        self.cards_tiers[8 * tier + 2 * index:8 * tier + 2 * index + 2] = self._take_deck_card(tier, column, card_index)
+
+    def reveal_reserved_card(self, player, tier, column, card_index):
+        # Resolve chance event left by a deterministic blind reservation: move given deck card to reserve
+        slot = 6 * player + 2 * self._nb_of_reserved_cards(player)
+        self.players_reserved[slot:slot + 2] = self._take_deck_card(tier, column, card_index)
+
     def _fill_new_card(self, tier, index, deterministic):
         self.cards_tiers[8 * tier + 2 * index:8 * tier + 2 * index + 2] = 0
         if not deterministic:
@@ -355,11 +530,14 @@ class Board:
         self.bank[0][:idx_gold] += paid_gems
         self.players_gems[player][idx_gold] -= missing_colors
         self.bank[0][idx_gold] += missing_colors
+        self._add_bonus(card1, player)
         self.players_cards[player] += card1
 
         self._give_nobles_if_earned(player)
 
     def _valid_buy(self, player):
+        if PROFILE:
+            self.counters[cnt_valid_buy] += 1
         cards_cost = self.cards_tiers[:2 * 12:2, :idx_gold]
 
         player_gems = self.players_gems[player][:idx_gold]
@@ -371,11 +549,15 @@ class Board:
         return np.logical_and(enough_gems_and_gold, not_empty_cards).astype(np.int8)
 
     def _buy(self, i, player, deterministic):
+        if PROFILE:
+            self.counters[cnt_buy] += 1
         tier, index = divmod(i, 4)
         self._buy_card(self.cards_tiers[2 * i], self.cards_tiers[2 * i + 1], player)
         self._fill_new_card(tier, index, deterministic)
 
     def _valid_reserve(self, player):
+        if PROFILE:
+            self.counters[cnt_valid_reserve] += 1
         not_empty_cards = np.vstack((self.cards_tiers[:2 * 12:2, :idx_gold], self.nb_deck_tiers[::2, :idx_gold])).sum(
             axis=1) != 0
 
@@ -384,6 +566,8 @@ class Board:
         return np.logical_and(not_empty_cards, empty_slot).astype(np.int8)
 
     def _reserve(self, i, player, deterministic):
+        if PROFILE:
+            self.counters[cnt_reserve] += 1
         # Detect empty reserve slot
         reserve_slots = [6 * player + 2 * i for i in range(3)]
         for slot in reserve_slots:
@@ -406,6 +590,8 @@ class Board:
             self.bank[0][idx_gold] -= 1
 
     def _valid_buy_reserve(self, player):
+        if PROFILE:
+            self.counters[cnt_valid_buy_reserve] += 1
         card_index = np.arange(3)
         cards_cost = self.players_reserved[6 * player + 2 * card_index, :idx_gold]
 
@@ -418,6 +604,8 @@ class Board:
         return np.logical_and(enough_gems_and_gold, not_empty_cards).astype(np.int8)
 
     def _buy_reserve(self, i, player):
+        if PROFILE:
+            self.counters[cnt_buy_reserve] += 1
         start_index = 6 * player + 2 * i
         self._buy_card(self.players_reserved[start_index], self.players_reserved[start_index + 1], player)
         # shift remaining reserve to the beginning
@@ -426,13 +614,17 @@ class Board:
         self.players_reserved[6 * player + 4:6 * player + 6] = 0  # empty last reserve slot
 
     def _valid_get_gems(self, player):
+        if PROFILE:
+            self.counters[cnt_valid_get_gems] += 1
         gems = np_different_gems_up_to_3[:, :idx_gold]
-        enough_in_bank = np_all_axis1((self.bank[0][:idx_gold] - gems) >= 0)
+        enough_in_bank = self._valid_get_bank_gems()
         not_too_many_gems = self.players_gems[player].sum() + gems.sum(axis=1) <= 10
         result = np.logical_and(enough_in_bank, not_too_many_gems).astype(np.int8)
         return result
 
     def _valid_get_gems_identical(self, player):
+        if PROFILE:
+            self.counters[cnt_valid_get_gems_identical] += 1
         colors = np.arange(5)
         enough_in_bank = self.bank[0][colors] >= 4
         not_too_many_gems = self.players_gems[player].sum() + 2 <= 10
@@ -440,6 +632,8 @@ class Board:
         return result
 
     def _get_gems(self, i, player):
+        if PROFILE:
+            self.counters[cnt_get_gems] += 1
         if i < np_different_gems_up_to_3.shape[0]:  # Different gems
             gems = np_different_gems_up_to_3[i][:idx_gold]
         else:  # 2 identical gems
@@ -450,15 +644,21 @@ class Board:
         self.players_gems[player][:idx_gold] += gems
 
     def _valid_give_gems(self, player):
+        if PROFILE:
+            self.counters[cnt_valid_give_gems] += 1
         gems = np_different_gems_up_to_2[:, :idx_gold]
         result = np_all_axis1((self.players_gems[player][:idx_gold] - gems) >= 0).astype(np.int8)
         return result
 
     def _valid_give_gems_identical(self, player):
+        if PROFILE:
+            self.counters[cnt_valid_give_gems_identical] += 1
         colors = np.arange(5)
         return (self.players_gems[player][colors] >= 2).astype(np.int8)
 
     def _give_gems(self, i, player):
+        if PROFILE:
+            self.counters[cnt_give_gems] += 1
         if i < np_different_gems_up_to_2.shape[0]:  # Different gems
             gems = np_different_gems_up_to_2[i][:idx_gold]
         else:  # 2 identical gems
@@ -468,12 +668,93 @@ class Board:
         self.bank[0][:idx_gold] += gems
         self.players_gems[player][:idx_gold] -= gems
 
+    def _valid_exchanges(self, player):
+        if PROFILE:
+            self.counters[cnt_valid_exchange] += 1
+        result = np.zeros(nb_exchanges, dtype=np.int8)
+        player_gems = self.players_gems[player][:idx_points]
+        nb_gems = player_gems.sum()
+        # Which gems can be taken from bank, as for actions 30-59
+        takeable = np.concatenate((self._valid_get_bank_gems(), self.bank[0][:idx_gold] >= 4))
+        for i in range(nb_exchanges):
+            take, give = np_exchange_take[i], np_exchange_give[i]
+            if not takeable[np_exchange_take_index[i]] or nb_gems + take.sum() - give.sum() != 10:
+                continue
+            result[i] = np.all(player_gems >= give[:idx_points])
+        return result
+
+    def _valid_get_bank_gems(self):
+        gems = np_different_gems_up_to_3[:, :idx_gold]
+        return np_all_axis1((self.bank[0][:idx_gold] - gems) >= 0)
+
+    def _exchange_gems(self, i, player):
+        if PROFILE:
+            self.counters[cnt_exchange] += 1
+        gems = np_exchange_take[i][:idx_points] - np_exchange_give[i][:idx_points]
+        self.bank[0][:idx_points] -= gems
+        self.players_gems[player][:idx_points] += gems
+
     def _give_nobles_if_earned(self, player):
+        if PROFILE:
+            self.counters[cnt_nobles_check] += 1
+        self._update_noble_deficits()
         for i_noble in range(self.num_nobles):
-            noble = self.nobles[i_noble][:idx_gold]
-            if noble.sum() > 0 and np.all(self.players_cards[player][:idx_gold] >= noble):
+            if self.noble_deficits[player, i_noble] == 0:
                 self.players_nobles[self.num_nobles * player + i_noble] = self.nobles[i_noble]
                 self.nobles[i_noble] = 0
+                self.noble_deficits[:, i_noble] = -1
+                self.deficits_source[i_noble] = 0
+
+    def _compute_noble_deficits(self):
+        deficits = np.empty((self.num_players, self.num_nobles), dtype=np.int8)
+        for i_noble in range(self.num_nobles):
+            noble = self.nobles[i_noble][:idx_gold]
+            for player in range(self.num_players):
+                if noble.sum() == 0:
+                    deficits[player, i_noble] = -1
+                else:
+                    deficits[player, i_noble] = np.maximum(noble - self.players_cards[player][:idx_gold], 0).sum()
+        return deficits
+
+    def _update_noble_deficits(self):
+        if self.deficits_dirty:
+            self.noble_deficits[:] = self._compute_noble_deficits()
+            self.deficits_source[:self.num_nobles] = self.nobles[:, :idx_gold]
+            self.deficits_source[self.num_nobles:] = self.players_cards[:, :idx_gold]
+            self.deficits_dirty = False
+
+    def _check_deficits_source(self):
+        # Table stays valid for any state with same nobles and bonuses (e.g. a copy of previous state)
+        if self.deficits_dirty:
+            return
+        if not (np.all(self.deficits_source[:self.num_nobles] == self.nobles[:, :idx_gold]) and
+                np.all(self.deficits_source[self.num_nobles:] == self.players_cards[:, :idx_gold])):
+            self.deficits_dirty = True
+
+    def _add_bonus(self, card1, player):
+        # Update deficits before player gets bonus of card1 (if table is up to date, else it will be recomputed)
+        if self.deficits_dirty:
+            return
+        for color in range(idx_gold):
+            if card1[color] == 0:
+                continue
+            for i_noble in range(self.num_nobles):
+                if self.nobles[i_noble][color] > self.players_cards[player][color]:
+                    self.noble_deficits[player, i_noble] -= min(card1[color],
+                                                                self.nobles[i_noble][color] - self.players_cards[player][color])
+            self.deficits_source[self.num_nobles + player, color] += card1[color]
+
+    def noble_deficit(self, player, i_noble):
+        # Number of bonus player misses to get given noble, -1 if noble is gone
+        self._update_noble_deficits()
+        return self.noble_deficits[player, i_noble]
+
+    def check_noble_deficits(self):
+        # Compare incremental table against full recomputation (for tests). A dirty table
+        # is not used before being recomputed, so there is nothing to check.
+        if self.deficits_dirty:
+            return True
+        return np.all(self.noble_deficits == self._compute_noble_deficits())
 
     def _nb_of_reserved_cards(self, player):
         for card in range(3):
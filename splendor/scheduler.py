@@ -0,0 +1,129 @@
+"""
+Scheduler running many matches on a pool of worker processes.
+
+Each worker keeps one warm SplendorGame per number of players and instantiates
+each agent only once, then streams the matches it receives through them. Agents
+are reset between games (see Arena.play), so their caches survive across
+matches instead of being reloaded for each one.
+"""
+import os
+from collections import Counter
+from multiprocessing import Pool
+
+from search.load import max_workers
+
+from .arena import Arena
+from .game import SplendorGame
+
+_games = {}
+_agents = {}
+
+
+def warm_game(num_players):
+    if num_players not in _games:
+        _games[num_players] = SplendorGame(num_players)
+    return _games[num_players]
+
+
+def warm_agents(game, match):
+    """
+    Returns: one agent per seat of match, reused across calls. A name appearing
+             several times in the same match gets distinct instances.
+    """
+    agents, occurrences = [], Counter()
+    for name in match:
+        key = (name, game.num_players, occurrences[name])
+        occurrences[name] += 1
+        if key not in _agents:
+            _agents[key] = Arena.create_player_for(game, name)
+        agents.append(_agents[key])
+    return agents
+
+
+def play_match(match, trials):
+    """
+    Play trials games of match in current process, rotating seats between games.
+
+    Returns:
+        match, Counter of wins per player name
+    """
+    game = warm_game(len(match))
+    arena = Arena(game, *match, agents=warm_agents(game, match))
+    counter = Counter()
+    for _ in range(trials):
+        game.reset()
+        arena.rotate_players()
+        counter.update(arena.play())
+    return match, counter
+
+
+def play_games(seatings):
+    """
+    Play one game for each seating, without rotating seats.
+
+    Returns:
+        list of (seating, list of winners) for each game
+    """
+    results = []
+    for seating in seatings:
+        game = warm_game(len(seating))
+        arena = Arena(game, *seating, agents=warm_agents(game, seating))
+        game.reset()
+        results.append((seating, arena.play()))
+    return results
+
+
+def _play_match(args):
+    return play_match(*args)
+
+
+class Scheduler:
+    def __init__(self, workers=None, agents=()):
+        """
+        Input:
+            workers: number of worker processes, None to size the pool from the resource needs of agents
+            agents: configurations of the agents which will play (see search.load)
+        """
+        self.workers = workers or (max_workers(agents) if agents else os.cpu_count())
+        self.pool = None
+
+    def __enter__(self):
+        self.pool = Pool(self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.terminate()
+        self.pool = None
+
+    def run(self, matches, trials, ordered=True):
+        """
+        Input:
+            matches: iterable of tuples of player names
+            trials: number of games per match
+            ordered: False to yield results as soon as they are available
+
+        Yields:
+            (match, Counter of wins per player name) for each match
+        """
+        tasks = ((match, trials) for match in matches)
+        yield from self._map(_play_match, tasks, ordered)
+
+    def run_games(self, seatings, batch_size=8):
+        """
+        Input:
+            seatings: list of tuples of player names, in seat order
+            batch_size: number of games sent at once to a worker
+
+        Yields:
+            (seating, list of winners) for each game, in no particular order
+        """
+        batches = (seatings[i:i + batch_size] for i in range(0, len(seatings), batch_size))
+        for results in self._map(play_games, batches, ordered=False):
+            yield from results
+
+    def _map(self, function, tasks, ordered):
+        if self.pool is None:
+            return map(function, tasks)
+        elif ordered:
+            return self.pool.imap(function, tasks)
+        return self.pool.imap_unordered(function, tasks)
@@ -0,0 +1,164 @@
+"""
+Spectator stream of live games.
+
+When a Spectator is given to Arena.play(), each game is published as compact
+JSON events: 'start' with the whole state, then one 'move' per turn with the
+move and only the rows of the state which changed, then 'end'. Publishing never
+blocks nor sleeps: events go to a JSON-lines file (to be followed with
+`tail -f` or the viewer below) and/or to a local HTTP server streaming them as
+server-sent events at /events, each viewer consuming at its own pace. A viewer
+connecting during a game first receives the events of the current game.
+
+Watch a game with:
+    python -m splendor.spectator games.jsonl [--wait 1]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .game import SplendorGame
+from .logic import move_to_str
+
+
+class Spectator:
+    def __init__(self, path=None, port=None, host='127.0.0.1'):
+        """
+        Input:
+            path: JSON-lines file receiving events, None to disable
+            port: port of the HTTP server streaming events (GET /events), None to disable
+        """
+        self.stream = open(path, 'a') if path is not None else None
+        self.events = []  # events of current game, as JSON strings
+        self.offset = 0  # number of events of previous games
+        self.condition = threading.Condition()
+        self.previous = None
+        self.game_index = 0
+        self.server = None
+        if port is not None:
+            self.server = ThreadingHTTPServer((host, port), self._handler())
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def publish(self, event):
+        line = json.dumps(event, separators=(',', ':'))
+        if self.stream is not None:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+        with self.condition:
+            if event['event'] == 'start':
+                self.offset += len(self.events)
+                self.events = []
+            self.events.append(line)
+            self.condition.notify_all()
+
+    def start_game(self, player_names, board):
+        self.previous = board.copy()
+        self.publish({'event': 'start', 'game': self.game_index, 'players': list(player_names),
+                      'state': board.tolist()})
+
+    def move(self, turn, player, action, board):
+        changed = np.flatnonzero((board != self.previous).any(axis=1))
+        self.previous = board.copy()
+        self.publish({'event': 'move', 'game': self.game_index, 'turn': turn, 'player': player,
+                      'action': int(action), 'move': move_to_str(action),
+                      'rows': {int(row): board[row].tolist() for row in changed}})
+
+    def end_game(self, winners):
+        self.publish({'event': 'end', 'game': self.game_index, 'winners': list(winners)})
+        self.game_index += 1
+
+    def follow(self, stop=None):
+        """
+        Yields: events (JSON strings) from the start of the current game, then live ones.
+                Events of a game finished before being fully read are skipped.
+        """
+        cursor = self.offset
+        while stop is None or not stop.is_set():
+            with self.condition:
+                while cursor >= self.offset + len(self.events):
+                    self.condition.wait(1.)
+                    if stop is not None and stop.is_set():
+                        return
+                cursor = max(cursor, self.offset)
+                pending = self.events[cursor - self.offset:]
+            cursor += len(pending)
+            yield from pending
+
+    def _handler(self):
+        spectator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/events':
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                try:
+                    for line in spectator.follow():
+                        self.wfile.write(f'data: {line}\n\n'.encode())
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.stream is not None:
+            self.stream.close()
+
+
+def follow_file(path, poll=0.2):
+    """
+    Yields: events (dictionaries) of a JSON-lines file, waiting for new ones like `tail -f`
+    """
+    with open(path, 'rb') as f:
+        while True:
+            line = f.readline()
+            if not line.endswith(b'\n'):
+                # Incomplete line: read it again once fully written
+                f.seek(-len(line), 1)
+                time.sleep(poll)
+                continue
+            yield json.loads(line)
+
+
+def watch(events, wait=1.):
+    """
+    Rebuild boards from events and print them, at the viewer's pace
+    """
+    game, state, players = None, None, None
+    for event in events:
+        if event['event'] == 'start':
+            state = np.array(event['state'], dtype=np.int8)
+            players = event['players']
+            game = SplendorGame(len(players))
+            game.print_board(state, players)
+        elif event['event'] == 'move' and state is not None:
+            for row, values in event['rows'].items():
+                state[int(row)] = values
+            print(f'Turn {event["turn"]} Player {event["player"]} ({players[event["player"]]}): {event["move"]}')
+            game.print_board(state, players)
+        elif event['event'] == 'end':
+            print(f'Game over: Winners {event["winners"]}')
+        time.sleep(wait)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Watch games published by a Spectator in a file')
+    parser.add_argument('path')
+    parser.add_argument('--wait', type=float, default=1.)
+    args = parser.parse_args()
+    watch(follow_file(args.path), args.wait)
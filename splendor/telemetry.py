@@ -0,0 +1,144 @@
+"""
+Per-move telemetry for Arena.
+
+When a Telemetry object is given to Arena.play(), each decision is timed and the
+engine calls done by the agent are counted (and optionally its memory
+allocations). Every decision is streamed as one JSON line. Without telemetry,
+Arena doesn't pay anything more than a test against None.
+"""
+import json
+import sys
+import tracemalloc
+from collections import Counter, defaultdict
+from time import perf_counter
+
+import numpy as np
+
+counted_game_calls = ('valid_moves', 'next_state_of')
+counted_board_calls = ('copy_state',)
+
+
+class _CountingBoard:
+    """
+    Proxy of a Board counting calls to some of its methods
+    """
+
+    def __init__(self, board, counter):
+        object.__setattr__(self, '_board', board)
+        object.__setattr__(self, '_counter', counter)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._board, name)
+        if name in counted_board_calls:
+            def counted(*args, **kwargs):
+                self._counter[name] += 1
+                return attribute(*args, **kwargs)
+            return counted
+        return attribute
+
+    def __setattr__(self, name, value):
+        setattr(self._board, name, value)
+
+
+class Telemetry:
+    def __init__(self, stream=None, track_allocations=False):
+        """
+        Input:
+            stream: file-like object (or path) receiving one JSON event per line, None to keep only the summary
+            track_allocations: True to measure memory allocated by agents while deciding (slower)
+        """
+        self._own_stream = isinstance(stream, str)
+        self.stream = open(stream, 'a') if self._own_stream else stream
+        self.track_allocations = track_allocations
+        self.latencies = defaultdict(list)
+        self.calls = defaultdict(Counter)
+        self.decisions = Counter()
+        self.counter = Counter()
+        self.game_index = 0
+        self._game = None
+        self._start = 0.
+        self._blocks = 0
+
+    def emit(self, event):
+        if self.stream is not None:
+            self.stream.write(json.dumps(event) + '\n')
+
+    def start_game(self, game, player_names):
+        # Instrument the game object shared with agents (undone by restore)
+        self.restore()
+        self._game = game
+        for name in counted_game_calls:
+            setattr(game, name, self._counted(name, getattr(game, name)))
+        game.board = _CountingBoard(game.board, self.counter)
+        if self.track_allocations:
+            tracemalloc.start()
+        self.emit({'event': 'start', 'game': self.game_index, 'players': list(player_names)})
+
+    def _counted(self, name, method):
+        def counted(*args, **kwargs):
+            self.counter[name] += 1
+            return method(*args, **kwargs)
+        return counted
+
+    def begin_decision(self):
+        self.counter.clear()
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            self._blocks = sys.getallocatedblocks()
+        self._start = perf_counter()
+
+    def end_decision(self, turn, player, agent, action):
+        latency = perf_counter() - self._start
+        event = {'event': 'move', 'game': self.game_index, 'turn': turn, 'player': player, 'agent': agent,
+                 'action': int(action), 'latency': latency, 'calls': dict(self.counter)}
+        if self.track_allocations:
+            event['alloc_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            event['alloc_blocks'] = sys.getallocatedblocks() - self._blocks
+        self.latencies[agent].append(latency)
+        self.calls[agent].update(self.counter)
+        self.decisions[agent] += 1
+        self.emit(event)
+
+    def restore(self):
+        # Remove instrumentation of the game, if any: Arena.play calls it even when the game raised
+        game = self._game
+        if game is None:
+            return
+        if self.track_allocations:
+            tracemalloc.stop()
+        for name in counted_game_calls:
+            game.__dict__.pop(name, None)
+        if isinstance(game.board, _CountingBoard):
+            game.board = game.board._board
+        self._game = None
+
+    def end_game(self, winners):
+        self.restore()
+        self.emit({'event': 'end', 'game': self.game_index, 'winners': list(winners)})
+        self.game_index += 1
+
+    def summary(self):
+        """
+        Returns: dictionary, for each agent, of latency percentiles (in seconds) and average engine calls per decision
+        """
+        result = {}
+        for agent, latencies in self.latencies.items():
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            result[agent] = {'decisions': self.decisions[agent], 'mean': float(np.mean(latencies)),
+                             'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                             **{name: self.calls[agent][name] / self.decisions[agent]
+                                for name in counted_game_calls + counted_board_calls}}
+        return result
+
+    def report(self):
+        lines = [f'{"agent":12s} {"moves":>6s} {"p50 ms":>9s} {"p95 ms":>9s} {"p99 ms":>9s} '
+                 f'{"valid/mv":>9s} {"next/mv":>9s} {"copy/mv":>9s}']
+        for agent, stats in sorted(self.summary().items()):
+            lines.append(f'{agent[:12]:12s} {stats["decisions"]:6d} {stats["p50"] * 1e3:9.2f} '
+                         f'{stats["p95"] * 1e3:9.2f} {stats["p99"] * 1e3:9.2f} {stats["valid_moves"]:9.1f} '
+                         f'{stats["next_state_of"]:9.1f} {stats["copy_state"]:9.1f}')
+        return '\n'.join(lines)
+
+    def close(self):
+        if self._own_stream:
+            self.stream.close()
@@ -0,0 +1,135 @@
+"""
+Tournament formats for 2 to 4 players per table.
+
+Agents are seeded by rating (highest rating first). All tables of a round are
+independent, so they are played concurrently by the Scheduler. A table plays
+several games rotating seats; its ranking is given by the number of games won,
+ties being broken by seed. A table can be smaller than table_size (but never
+less than 2 players) when the number of agents doesn't allow full tables; a lone
+agent gets a bye.
+"""
+import math
+from collections import Counter, defaultdict
+
+
+def seeding(players, ratings=None):
+    """
+    Returns: dictionary giving seed of each player, 0 being the highest rating
+    """
+    ratings = ratings or {}
+    ordered = sorted(players, key=lambda p: -ratings.get(p, 1500.))
+    return {p: i for i, p in enumerate(ordered)}
+
+
+def _split_tables(players, table_size):
+    # Split ordered players in tables of at most table_size players, all having at least 2 players if possible
+    nb_tables = math.ceil(len(players) / table_size)
+    sizes = [len(players) // nb_tables + (i < len(players) % nb_tables) for i in range(nb_tables)]
+    tables, start = [], 0
+    for size in sizes:
+        tables.append(list(players[start:start + size]))
+        start += size
+    return tables
+
+
+def _play_round(scheduler, tables, games):
+    """
+    Returns: for each table, Counter of games won by each player
+    """
+    playing = [tuple(table) for table in tables if len(table) > 1]
+    results = dict(scheduler.run(playing, games))
+    return [results.get(tuple(table), Counter()) for table in tables]
+
+
+def _table_ranking(table, counter, seeds):
+    return sorted(table, key=lambda p: (-counter[p], seeds[p]))
+
+
+def swiss(players, scheduler, table_size=2, games=12, rounds=None, ratings=None, log=print):
+    """
+    Swiss-system tournament: at each round, players with similar scores are grouped
+    together, avoiding players who already met. Each player gets the ratio of
+    games won at its table as points (a bye is worth 1 point).
+
+    Returns:
+        standings: list of (player, points) sorted from first to last
+    """
+    seeds = seeding(players, ratings)
+    rounds = rounds or max(math.ceil(math.log(len(players)) / math.log(table_size)), 1)
+    points = defaultdict(float)
+    met = set()
+
+    for rnd in range(rounds):
+        remaining = sorted(players, key=lambda p: (-points[p], seeds[p]))
+        tables = []
+        for size in [len(t) for t in _split_tables(remaining, table_size)]:
+            table = [remaining.pop(0)]
+            # Closest opponents in standings who didn't meet anyone of the table yet, else closest ones
+            for candidate in list(remaining):
+                if len(table) == size:
+                    break
+                if all(frozenset((candidate, p)) not in met for p in table):
+                    table.append(candidate)
+                    remaining.remove(candidate)
+            while len(table) < size:
+                table.append(remaining.pop(0))
+            tables.append(table)
+
+        for table, counter in zip(tables, _play_round(scheduler, tables, games)):
+            if len(table) == 1:
+                points[table[0]] += 1.
+                continue
+            met.update(frozenset((a, b)) for a in table for b in table if a != b)
+            for p in table:
+                points[p] += counter[p] / games
+        log(f'Swiss round {rnd + 1}/{rounds}: ' +
+            ', '.join(' vs '.join(table) for table in tables))
+
+    standings = sorted(players, key=lambda p: (-points[p], seeds[p]))
+    return [(p, points[p]) for p in standings]
+
+
+def double_elimination(players, scheduler, table_size=2, games=12, ratings=None, log=print):
+    """
+    Double-elimination tournament: the winner of a table stays in its bracket,
+    other players drop from winners bracket to losers bracket, or are eliminated
+    if they were already in losers bracket. When a single player is left in each
+    bracket, they meet in the grand final (played again if the losers-bracket
+    player wins it).
+
+    Returns:
+        ranking: list of players from champion to first eliminated
+    """
+    seeds = seeding(players, ratings)
+    losses = {p: 0 for p in players}
+    eliminated = []
+    rnd = 0
+
+    while sum(1 for p in players if losses[p] < 2) > 1:
+        rnd += 1
+        tables = []
+        for bracket in (0, 1):
+            alive = sorted((p for p in players if losses[p] == bracket), key=seeds.get)
+            if not alive:
+                continue
+            # Snake seeding, so that best seeds are spread across tables
+            nb_tables = len(_split_tables(alive, table_size))
+            bracket_tables = [[] for _ in range(nb_tables)]
+            for i, p in enumerate(alive):
+                lap, index = divmod(i, nb_tables)
+                bracket_tables[index if lap % 2 == 0 else nb_tables - 1 - index].append(p)
+            tables += bracket_tables
+        # Grand final: last players of each bracket meet
+        if len(tables) == 2 and len(tables[0]) == 1 and len(tables[1]) == 1:
+            tables = [tables[0] + tables[1]]
+
+        for table, counter in zip(tables, _play_round(scheduler, tables, games)):
+            for p in _table_ranking(table, counter, seeds)[1:]:
+                losses[p] += 1
+                if losses[p] == 2:
+                    eliminated.append(p)
+        log(f'Double elimination round {rnd}: ' +
+            ', '.join(' vs '.join(table) for table in tables))
+
+    champions = [p for p in players if losses[p] < 2]
+    return champions + eliminated[::-1]
@@ -0,0 +1,138 @@
+"""
+Tuning of agent parameters by successive halving.
+
+Every configuration of a parameter grid plays against fixed opponents, with
+balanced seats (see evaluation). After each round, only the best 1/eta of the
+configurations are kept and the next round gives each of them eta times more
+games, so most games are spent on the promising configurations. Games of all
+configurations of a round are played in parallel on the Scheduler workers.
+Wins are accumulated over rounds, and results are written as a CSV table.
+
+Run with:
+    python -m splendor.tuning ismcts --grid playouts=100,300,1000 --grid exploration=0.7,1.4 \
+        --opponents greedy --games 12 --output tuning.csv
+or, to tune the selection of mcts:
+    python -m splendor.tuning mcts --grid exploitation=0.3,0.5,0.7 --opponents greedy
+"""
+import argparse
+import csv
+from collections import defaultdict
+from itertools import product
+
+from tqdm import tqdm
+
+from search.load import format_config, parse_config
+
+from .evaluation import balanced_seatings, wilson_interval
+from .scheduler import Scheduler
+
+
+def grid_configurations(name, grid):
+    """
+    Input:
+        name: agent name
+        grid: dictionary of lists of values per parameter
+
+    Returns: list of configurations (e.g. 'ismcts:playouts=100,exploration=0.7'), one per combination of values
+    """
+    keys = list(grid)
+    configurations = [format_config(name, dict(zip(keys, values))) for values in product(*grid.values())]
+    for configuration in configurations:
+        parse_config(configuration)  # Reject unknown parameters before playing
+    return configurations
+
+
+def successive_halving(candidates, opponents, scheduler, games=12, eta=2, batch_size=8):
+    """
+    Input:
+        candidates: configurations to compare
+        opponents: configurations of the 1 to 3 fixed opponents playing every game
+        games: number of games per candidate in the first round, multiplied by eta at each round
+        eta: only the best 1/eta of candidates go to the next round
+
+    Returns:
+        list of results per candidate, best first, with its number of rounds, games, win rate and interval
+    """
+    assert eta >= 2, 'eta should be at least 2'
+    assert 1 <= len(opponents) <= 3, 'Number of opponents should be either 1, 2, or 3.'
+    assert not set(candidates) & set(opponents), 'A candidate cannot be one of the opponents'
+    wins, played, rounds = defaultdict(float), defaultdict(int), defaultdict(int)
+    alive, round_games, round_index = list(candidates), games, 0
+    while alive:
+        round_index += 1
+        seatings = [seating for candidate in alive for seating in
+                    balanced_seatings([candidate, *opponents], round_games)]
+        for seating, winners in tqdm(scheduler.run_games(seatings, batch_size), total=len(seatings),
+                                     desc=f'Round {round_index} ({len(alive)} configurations)'):
+            candidate = next(name for name in seating if name not in opponents)
+            played[candidate] += 1
+            if candidate in winners:
+                wins[candidate] += 1. / len(winners)
+        for candidate in alive:
+            rounds[candidate] = round_index
+
+        if len(alive) == 1:
+            break
+        alive.sort(key=lambda c: wins[c] / played[c], reverse=True)
+        alive = alive[:max(len(alive) // eta, 1)]
+        round_games *= eta
+
+    results = []
+    for candidate in candidates:
+        name, params = parse_config(candidate)
+        results.append({
+            'configuration': candidate,
+            'params': params,
+            'rounds': rounds[candidate],
+            'games': played[candidate],
+            'win_rate': wins[candidate] / played[candidate],
+            'interval': wilson_interval(wins[candidate], played[candidate]),
+        })
+    results.sort(key=lambda r: (r['rounds'], r['win_rate']), reverse=True)
+    return results
+
+
+def write_results(results, path):
+    keys = sorted({key for result in results for key in result['params']})
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['configuration', *keys, 'rounds', 'games', 'win_rate', 'low', 'high'])
+        for result in results:
+            low, high = result['interval']
+            writer.writerow([result['configuration'], *(result['params'].get(key, '') for key in keys),
+                             result['rounds'], result['games'], f'{result["win_rate"]:.4f}', f'{low:.4f}', f'{high:.4f}'])
+
+
+def print_results(results):
+    print(f'{"configuration":40s} {"rounds":>6s} {"games":>6s} {"win rate":>22s}')
+    for result in results:
+        low, high = result['interval']
+        print(f'{result["configuration"][:40]:40s} {result["rounds"]:6d} {result["games"]:6d} '
+              f'{result["win_rate"] * 100:6.1f}% [{low * 100:5.1f},{high * 100:5.1f}]')
+
+
+def _grid_argument(text):
+    key, sep, values = text.partition('=')
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f'Grid "{text}" should be written key=value1,value2,...')
+    return key, values.split(',')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune parameters of an agent by successive halving')
+    parser.add_argument('agent')
+    parser.add_argument('--grid', type=_grid_argument, action='append', default=[],
+                        help='values of one parameter, e.g. playouts=100,300,1000 (repeatable)')
+    parser.add_argument('--opponents', nargs='+', default=['greedy'])
+    parser.add_argument('--games', type=int, default=12, help='games per configuration in the first round')
+    parser.add_argument('--eta', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--output', default='tuning.csv')
+    args = parser.parse_args()
+
+    candidates = grid_configurations(args.agent, dict(args.grid))
+    with Scheduler(args.workers, agents=candidates + args.opponents) as scheduler:
+        results = successive_halving(candidates, args.opponents, scheduler, args.games, args.eta, args.batch_size)
+    write_results(results, args.output)
+    print_results(results)
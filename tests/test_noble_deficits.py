@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from splendor.game import SplendorGame
+from splendor.logic_numba import Board
+
+
+def _random_action(valids, rng):
+    # Buys first, so that bonuses and nobles keep changing
+    buys = np.flatnonzero(valids[:12])
+    return int(rng.choice(buys)) if buys.size else int(rng.choice(np.flatnonzero(valids)))
+
+
+@pytest.mark.parametrize('num_players', [2, 3, 4])
+def test_board_updates_deficits_incrementally(num_players):
+    rng = np.random.default_rng(num_players)
+    np.random.seed(num_players)
+    board = Board(num_players)
+    buys = 0
+    for _ in range(10):
+        board.init_game()
+        player = 0
+        while not board.check_end_game().any():
+            action = _random_action(board.valid_moves(player), rng)
+            board.make_move(action, player, False)
+            if action < 12:
+                buys += 1
+                assert not board.deficits_dirty
+                assert board.check_noble_deficits()
+            player = (player + 1) % num_players
+    assert buys > 0
+
+
+@pytest.mark.parametrize('num_players', [2, 3, 4])
+def test_game_path_keeps_deficits_table(num_players):
+    rng = np.random.default_rng(num_players)
+    np.random.seed(num_players)
+    game = SplendorGame(num_players)
+    for _ in range(5):
+        board, player = game.initial_state(), 0
+        while not game.game_ended(board).any():
+            deficits = game.get_noble_deficits(board, player)
+            assert deficits == game.board._compute_noble_deficits()[player].tolist()
+            action = _random_action(game.valid_moves(board, player), rng)
+            board, next_player = game.next_state_of(board, player, action)
+            # Each call loads a copy of the previous state, which keeps the table up to date
+            assert not game.board.deficits_dirty
+            assert game.board.check_noble_deficits()
+            player = next_player
+
+
+def test_replaced_state_invalidates_deficits():
+    np.random.seed(0)
+    game = SplendorGame(2)
+    board = game.initial_state()
+    game.get_noble_deficits(board, 0)
+    other = game.initial_state()
+    game.board.copy_state(other, True)
+    assert game.board.deficits_dirty
+    assert game.get_noble_deficits(other, 1) == game.board._compute_noble_deficits()[1].tolist()